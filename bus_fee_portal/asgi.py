@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bus_fee_portal.settings')
+# Sync code runs in a thread pool here, and a persistent connection per pool
+# thread outlives its request; use DB_POOL on PostgreSQL instead.
+os.environ.setdefault('CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
@@ -0,0 +1,55 @@
+"""Gunicorn settings, used by the Procfile:
+
+    gunicorn -c python:bus_fee_portal.gunicorn_conf bus_fee_portal.wsgi
+
+Every value can be overridden with the environment variables below.
+"""
+import multiprocessing
+import os
+import time
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Load Django once in the master and fork the workers from it, so they
+# start ready and share the imported code's memory.
+preload_app = os.getenv("GUNICORN_PRELOAD", "True") == "True"
+
+# WEB_CONCURRENCY is set by Heroku and Render to suit the instance size.
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count() * 2 + 1, 8))))
+# Threads let a worker keep serving while one request waits on the
+# database or the payment gateway.
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread" if threads > 1 else "sync"
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then, staggered so they don't all restart at once.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = max_requests // 10
+
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def _warm_up(log):
+    from core.bootstrap import warm_up
+
+    started = time.perf_counter()
+    summary = warm_up()
+    log.info(
+        "Warmed up %(urls)s URL patterns and %(templates)s templates in %(seconds).2fs",
+        {**summary, "seconds": time.perf_counter() - started},
+    )
+
+
+def when_ready(server):
+    # Runs in the master after the app is preloaded, before any worker is
+    # forked, so connections wait in the listen queue until workers are warm.
+    if server.cfg.preload_app:
+        _warm_up(server.log)
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        _warm_up(worker.log)
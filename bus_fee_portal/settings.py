@@ -1,6 +1,8 @@
 from pathlib import Path
 import os
 
+import dj_database_url
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-only-insecure-secret-key-change-in-production")
@@ -28,20 +30,27 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = "core.User"
 
 AUTHENTICATION_BACKENDS = [
-    "django.contrib.auth.backends.ModelBackend",
+    "core.backends.CachedModelBackend",
 ]
 
+SESSION_ENGINE = os.getenv("SESSION_ENGINE", "django.contrib.sessions.backends.cached_db")
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.middleware.TenantMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.StudentProfileMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if os.getenv("REQUEST_METRICS") == "True":
+    MIDDLEWARE.insert(0, "core.middleware.RequestMetricsMiddleware")
+
 ROOT_URLCONF = "bus_fee_portal.urls"
 
 TEMPLATES = [
@@ -61,9 +70,62 @@ TEMPLATES = [
 WSGI_APPLICATION = "bus_fee_portal.wsgi.application"
 
 DATABASES = {
+    "default": dj_database_url.config(
+        default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
+        conn_max_age=int(os.getenv("CONN_MAX_AGE", "600")),
+        conn_health_checks=True,
+    )
+}
+
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql" and os.getenv("DB_POOL") == "True":
+    # psycopg's pool replaces persistent connections; Django refuses both at once.
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    }
+
+if os.getenv("REPLICA_DATABASE_URL"):
+    DATABASES["replica"] = dj_database_url.parse(
+        os.getenv("REPLICA_DATABASE_URL"),
+        conn_max_age=int(os.getenv("CONN_MAX_AGE", "600")),
+        conn_health_checks=True,
+    )
+    # Tests run against a single database; the replica alias mirrors it.
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+    DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+    MIDDLEWARE.append("core.middleware.ReplicaRoutingMiddleware")
+
+for database in DATABASES.values():
+    if database["ENGINE"] == "django.db.backends.sqlite3" and os.getenv("SQLITE_TUNING", "True") == "True":
+        database.setdefault("OPTIONS", {}).update({
+            "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+            "transaction_mode": "IMMEDIATE",
+            "timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "20")),
+        })
+
+DATABASE_REPLICA = {
+    "ALIAS": "replica",
+    # Report pages whose reads can be slightly behind the primary.
+    "VIEWS": [
+        "admin_dashboard",
+        "admin_bus_list",
+        "admin_bus_students",
+        "admin_ledger",
+        "admin_export_fees",
+        "admin_defaulters",
+        "admin_view_student_fees",
+    ],
+    # Only these models are ever read from the replica; users and sessions
+    # always come from the primary.
+    "MODELS": ["core.Bus", "core.StudentProfile", "core.FeeRecord", "core.PaymentOrder", "core.PaymentProof"],
+    "PIN_SECONDS": int(os.getenv("REPLICA_PIN_SECONDS", "10")),
+}
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "bus-fee-portal"),
     }
 }
 
@@ -76,8 +138,84 @@ STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+MEDIA_URL = "/media/"
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", str(BASE_DIR / "media"))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
 RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET")
+
+FEE_SCHEDULE = {
+    "START_YEAR": int(os.getenv("FEE_START_YEAR", "0")) or None,
+    "AMOUNT_OVERRIDES": {},
+}
+
+PAYMENT_GATEWAY = {
+    "BACKEND": os.getenv("PAYMENT_GATEWAY_BACKEND", "core.gateway.RazorpayGateway"),
+    "OPTIONS": {
+        "connect_timeout": float(os.getenv("PAYMENT_GATEWAY_CONNECT_TIMEOUT", "3.05")),
+        "read_timeout": float(os.getenv("PAYMENT_GATEWAY_READ_TIMEOUT", "10")),
+        "max_retries": int(os.getenv("PAYMENT_GATEWAY_MAX_RETRIES", "2")),
+        "pool_size": int(os.getenv("PAYMENT_GATEWAY_POOL_SIZE", "10")),
+    },
+}
+
+ACTIVATION_TOKEN_MAX_AGE = int(os.getenv("ACTIVATION_TOKEN_MAX_AGE", str(14 * 24 * 60 * 60)))
+
+PAYMENT_PROOFS = {
+    "MAX_UPLOAD_SIZE": int(os.getenv("PAYMENT_PROOF_MAX_UPLOAD_MB", "15")) * 1024 * 1024,
+    "MAX_DIMENSION": 1600,
+    "MAX_BYTES": 300 * 1024,
+    "THUMBNAIL_SIZE": 320,
+    "KEEP_ORIGINALS": os.getenv("PAYMENT_PROOF_KEEP_ORIGINALS") == "True",
+    "PROCESS_IN_THREAD": os.getenv("PAYMENT_PROOF_IN_THREAD", "True") == "True",
+}
+
+DUE_REMINDERS = {
+    "BACKEND": os.getenv("REMINDER_BACKEND", "core.reminders.ConsoleProvider"),
+    "RATE": float(os.getenv("REMINDER_RATE", "1")),
+    "BURST": int(os.getenv("REMINDER_BURST", "10")),
+    "MAX_ATTEMPTS": int(os.getenv("REMINDER_MAX_ATTEMPTS", "5")),
+}
+
+BOOTSTRAP = {
+    # The admin account that manage.py bootstrap creates when it is missing.
+    "ADMIN_USERNAME": os.getenv("ADMIN_USERNAME", "admin"),
+    "ADMIN_EMAIL": os.getenv("ADMIN_EMAIL", "admin@example.com"),
+    "ADMIN_PASSWORD": os.getenv("ADMIN_PASSWORD", "admin123"),
+    "DEMO_DATA": os.getenv("BOOTSTRAP_DEMO_DATA") == "True",
+}
+
+TENANTS = {
+    # Schools are served at <slug>.<BASE_DOMAIN> or at their own domain.
+    "BASE_DOMAIN": os.getenv("TENANT_BASE_DOMAIN", ""),
+    # Serves hosts that match no school; empty to answer those with 404.
+    "DEFAULT_SCHOOL": os.getenv("TENANT_DEFAULT_SCHOOL", "default"),
+}
+
+REQUEST_METRICS = {
+    "SLOW_QUERY_MS": float(os.getenv("SLOW_QUERY_MS", "100")),
+    "DUPLICATE_QUERY_THRESHOLD": int(os.getenv("DUPLICATE_QUERY_THRESHOLD", "3")),
+}
+
+METRICS_LOG_FILE = os.getenv("METRICS_LOG_FILE")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "metrics": {"format": "%(asctime)s %(levelname)s %(message)s"},
+    },
+    "handlers": {
+        "metrics": (
+            {"class": "logging.FileHandler", "filename": METRICS_LOG_FILE, "formatter": "metrics"}
+            if METRICS_LOG_FILE
+            else {"class": "logging.StreamHandler", "formatter": "metrics"}
+        ),
+    },
+    "loggers": {
+        "core.metrics": {"handlers": ["metrics"], "level": "INFO", "propagate": False},
+    },
+}
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, StudentProfile, FeeRecord
+from .models import User, School, StudentProfile, FeeRecord, PaymentProof, WebhookEvent, DueReminder
 
 
 @admin.register(StudentProfile)
@@ -11,14 +11,43 @@ class StudentProfileAdmin(admin.ModelAdmin):
 
 @admin.register(FeeRecord)
 class FeeRecordAdmin(admin.ModelAdmin):
-    list_display = ['student_profile', 'month', 'status']
-    list_filter = ['month', 'status']
+    list_display = ['student_profile', 'period', 'status']
+    list_filter = ['status']
+    date_hierarchy = 'period'
     search_fields = ['student_profile__full_name']
-    ordering = ['month']
+    ordering = ['period', 'id']
 
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
-    list_display = ['username', 'role', 'is_active']
-    list_filter = ['role']
+    list_display = ['username', 'role', 'school', 'is_active']
+    list_filter = ['role', 'school']
     search_fields = ['username']
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'event_type', 'received_at', 'processed_at']
+    list_filter = ['event_type']
+    search_fields = ['event_id']
+
+
+@admin.register(PaymentProof)
+class PaymentProofAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'status', 'original_size', 'image_size', 'created_at']
+    list_filter = ['status']
+    search_fields = ['sha256']
+
+
+@admin.register(DueReminder)
+class DueReminderAdmin(admin.ModelAdmin):
+    list_display = ['student_profile', 'period', 'phone', 'status', 'attempts', 'sent_at']
+    list_filter = ['status']
+    date_hierarchy = 'period'
+    search_fields = ['student_profile__full_name', 'phone']
+
+
+@admin.register(School)
+class SchoolAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'domain']
+    search_fields = ['name', 'slug', 'domain']
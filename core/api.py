@@ -0,0 +1,214 @@
+from functools import wraps
+
+from django.db.models import F
+from django.http import JsonResponse
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_safe
+
+from .fees import parse_period
+from .ledger import filter_fee_records, filter_students
+from .models import Bus, FeeRecord
+from .pagination import InvalidCursor, keyset_page
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+MAX_BULK_STUDENTS = 500
+
+# Public field name -> ORM lookup. Every list is read with values(), so no
+# model instances are built.
+BUS_FIELDS = {
+    "id": "id",
+    "bus_number": "bus_number",
+    "bus_name": "bus_name",
+    "driver_name": "driver_name",
+    "driver_phone": "driver_phone",
+    "updated_at": "updated_at",
+}
+STUDENT_FIELDS = {
+    "id": "id",
+    "full_name": "full_name",
+    "student_class": "student_class",
+    "bus_number": "bus_number",
+    "bus_route": "bus_route",
+    "monthly_fee": "monthly_fee",
+    "outstanding_amount": "outstanding_amount",
+    "unpaid_months": "unpaid_months",
+    "last_payment_date": "last_payment_date",
+    "updated_at": "updated_at",
+}
+FEE_FIELDS = {
+    "id": "id",
+    "student": "student_profile_id",
+    "period": "period",
+    "amount": "amount",
+    "status": "status",
+    "verification_status": "verification_status",
+    "payment_date": "payment_date",
+    "transaction_id": "transaction_id",
+    "updated_at": "updated_at",
+}
+FEE_STATUS_FIELDS = ["period", "amount", "status"]
+
+
+class ApiError(ValueError):
+    pass
+
+
+def _error(message, status):
+    return JsonResponse({"error": message}, status=status)
+
+
+def api_view(*roles):
+    """Read-only, gzipped JSON view for logged-in users with one of ``roles``.
+
+    Unlike ``role_required`` this answers 401/403 instead of redirecting to
+    the login page, and turns ``ApiError`` into a 400.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return _error("Authentication required.", 401)
+            if request.user.role not in roles:
+                return _error("Not allowed.", 403)
+            try:
+                return view_func(request, *args, **kwargs)
+            except ApiError as exc:
+                return _error(str(exc), 400)
+        return gzip_page(require_safe(wrapper))
+    return decorator
+
+
+def _ids(value, name):
+    try:
+        return [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise ApiError(f"{name} must be a comma-separated list of ids.")
+
+
+def _int(request, name, default=None, maximum=None):
+    value = request.GET.get(name)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(f"{name} must be a whole number.")
+    if number < 1 or (maximum and number > maximum):
+        raise ApiError(f"{name} must be between 1 and {maximum}." if maximum else f"{name} must be positive.")
+    return number
+
+
+def _period(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        return parse_period(value)
+    except ValueError:
+        raise ApiError(f"{name} must be a billing month such as 2026-06.")
+
+
+def _fields(request, available, always=("id",)):
+    """Names from ``?fields=``, or every field; ``always`` fields are added
+    because pagination or grouping needs them."""
+    requested = request.GET.get("fields")
+    if not requested:
+        return list(available)
+    names = [name.strip() for name in requested.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(available))
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}.")
+    return [name for name in always if name not in names] + names
+
+
+def _values(queryset, fields, available):
+    plain = [name for name in fields if available[name] == name]
+    renamed = {name: F(available[name]) for name in fields if available[name] != name}
+    return queryset.values(*plain, **renamed)
+
+
+def _fee_filters(request):
+    filters = {
+        "status": request.GET.get("status"),
+        "month": _period(request, "period"),
+        "due_through": _period(request, "due_through"),
+        "student_class": request.GET.get("class"),
+        "bus": _int(request, "bus"),
+        "route": request.GET.get("route"),
+    }
+    if filters["status"] and filters["status"] not in dict(FeeRecord.STATUS_CHOICES):
+        raise ApiError("status must be one of: " + ", ".join(dict(FeeRecord.STATUS_CHOICES)) + ".")
+    return filters
+
+
+def _students_for(request):
+    """Student ids the caller asked for and may see; None means no limit."""
+    if request.user.role == "student":
+        return [request.student_profile_id]
+    if request.GET.get("students"):
+        return _ids(request.GET["students"], "students")
+    return None
+
+
+def _page(request, queryset, fields, available):
+    limit = _int(request, "limit", DEFAULT_LIMIT, MAX_LIMIT)
+    try:
+        page = keyset_page(_values(queryset, fields, available), ["id"], request.GET.get("cursor"), limit)
+    except InvalidCursor:
+        raise ApiError("Invalid cursor.")
+    return JsonResponse({"results": page.items, "next": page.next_cursor})
+
+
+@api_view("admin")
+def api_buses(request):
+    return _page(request, Bus.objects.all(), _fields(request, BUS_FIELDS), BUS_FIELDS)
+
+
+@api_view("admin", "student")
+def api_students(request):
+    students = filter_students({
+        "student_class": request.GET.get("class"),
+        "bus": _int(request, "bus"),
+        "route": request.GET.get("route"),
+    })
+    ids = _students_for(request)
+    if ids is not None:
+        students = students.filter(id__in=ids)
+    return _page(request, students, _fields(request, STUDENT_FIELDS), STUDENT_FIELDS)
+
+
+@api_view("admin", "student")
+def api_fees(request):
+    records = filter_fee_records(_fee_filters(request))
+    ids = _students_for(request)
+    if ids is not None:
+        records = records.filter(student_profile_id__in=ids)
+    return _page(request, records, _fields(request, FEE_FIELDS), FEE_FIELDS)
+
+
+@api_view("admin", "student")
+def api_fee_status(request):
+    """Fee status for many students at once: ``?students=1,2,3`` or
+    ``?bus=12``, grouped by student id, from one ``values_list()`` query."""
+    ids = _students_for(request)
+    filters = _fee_filters(request)
+    if ids is None and not filters["bus"]:
+        raise ApiError("Give students=<ids> or bus=<bus number>.")
+    if ids is not None and len(ids) > MAX_BULK_STUDENTS:
+        raise ApiError(f"At most {MAX_BULK_STUDENTS} students per request.")
+
+    records = filter_fee_records(filters)
+    if ids is not None:
+        records = records.filter(student_profile_id__in=ids)
+    fields = FEE_STATUS_FIELDS
+    if request.GET.get("fields"):
+        fields = _fields(request, {name: lookup for name, lookup in FEE_FIELDS.items() if name != "student"}, always=())
+
+    rows = records.order_by("student_profile_id", "period").values_list(
+        "student_profile_id", *(FEE_FIELDS[name] for name in fields)
+    )
+    results = {}
+    for student_id, *values in rows:
+        results.setdefault(str(student_id), []).append(dict(zip(fields, values)))
+    return JsonResponse({"results": results})
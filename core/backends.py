@@ -0,0 +1,48 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .caching import cache_is_shared
+from .tenants import current_school
+
+USER_CACHE_TIMEOUT = 15 * 60
+
+
+def user_cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that resolves the session's user from the cache.
+
+    ``core.signals`` drops the entry whenever the user is saved or deleted, so
+    role, password (and therefore the session hash) and ``is_active`` are
+    never stale. That only holds when every process shares the cache, so
+    with a per-process cache (the LocMemCache default) it behaves exactly
+    like ModelBackend. A user of another school is treated as logged out.
+    """
+
+    def user_can_authenticate(self, user):
+        school = current_school()
+        if school and user.school_id not in (None, school.pk):
+            return False
+        return super().user_can_authenticate(user)
+
+    def get_user(self, user_id):
+        if not cache_is_shared():
+            return super().get_user(user_id)
+        user = cache.get(user_cache_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(user_cache_key(user_id), user, USER_CACHE_TIMEOUT)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        if not cache_is_shared():
+            return await super().aget_user(user_id)
+        user = await cache.aget(user_cache_key(user_id))
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await cache.aset(user_cache_key(user_id), user, USER_CACHE_TIMEOUT)
+        return user if user is not None and self.user_can_authenticate(user) else None
@@ -0,0 +1,115 @@
+from django.db.models import Case, Count, F, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.query import QuerySet
+
+from .models import FeeRecord, StudentProfile, current_period
+
+
+def _owed(state):
+    status, amount, _ = state
+    return (0, 0) if status == "paid" else (amount, 1)
+
+
+def _last_payment_subquery():
+    return Subquery(
+        FeeRecord.objects.filter(student_profile=OuterRef("pk"), status="paid")
+        .order_by().values("student_profile").annotate(last=Max("payment_date")).values("last")
+    )
+
+
+def fee_record_saved(record, created):
+    """Apply the change in one record to its student's balance.
+
+    A single UPDATE with F() expressions, so concurrent payments for the same
+    student can't overwrite each other's totals. The amount only moves if the
+    record's period is already counted (``dues_through``).
+    """
+    old = None if created else getattr(record, "_saved_balance_state", None)
+    new = record.balance_state()
+    record._saved_balance_state = new
+    if not created and (old is None or old[2] != new[2]):
+        # Loaded without the balance fields, or moved to another period.
+        refresh_balances([record.student_profile_id])
+        return
+
+    old_amount, old_months = _owed(old) if old else (0, 0)
+    new_amount, new_months = _owed(new)
+    changes = {}
+    if (new_amount, new_months) != (old_amount, old_months):
+        counted = Q(dues_through__gte=record.period)
+        changes["outstanding_amount"] = Case(
+            When(counted, then=F("outstanding_amount") + (new_amount - old_amount)),
+            default=F("outstanding_amount"),
+        )
+        changes["unpaid_months"] = Case(
+            When(counted, then=F("unpaid_months") + (new_months - old_months)),
+            default=F("unpaid_months"),
+        )
+
+    was_paid = bool(old) and old[0] == "paid"
+    if new[0] == "paid" and record.payment_date:
+        paid_at = Value(record.payment_date)
+        changes["last_payment_date"] = Case(
+            When(Q(last_payment_date__isnull=True) | Q(last_payment_date__lt=paid_at), then=paid_at),
+            default=F("last_payment_date"),
+        )
+    elif was_paid and new[0] != "paid":
+        changes["last_payment_date"] = _last_payment_subquery()
+
+    if changes:
+        StudentProfile.objects.filter(pk=record.student_profile_id).update(**changes)
+
+
+def fee_record_deleted(record):
+    state = getattr(record, "_saved_balance_state", None) or record.balance_state()
+    amount, months = _owed(state)
+    changes = {}
+    if months:
+        changes["outstanding_amount"] = Case(
+            When(dues_through__gte=state[2], then=F("outstanding_amount") - amount),
+            default=F("outstanding_amount"),
+        )
+        changes["unpaid_months"] = Case(
+            When(dues_through__gte=state[2], then=F("unpaid_months") - months),
+            default=F("unpaid_months"),
+        )
+    if state[0] == "paid":
+        changes["last_payment_date"] = _last_payment_subquery()
+    if changes:
+        StudentProfile.objects.filter(pk=record.student_profile_id).update(**changes)
+
+
+def refresh_balances(profiles=None, through=None):
+    """Recompute balances from the fee records in one UPDATE.
+
+    Covers every student, or just ``profiles`` (a queryset or an iterable of
+    ids), counting unpaid periods up to ``through`` (default: this month).
+    Used after bulk writes that bypass ``save()``, and by ``manage.py
+    rebuild_balances`` when the month rolls over. Returns the number of
+    students updated.
+    """
+    through = through or current_period()
+    unpaid = (
+        FeeRecord.objects.filter(student_profile=OuterRef("pk"), period__lte=through)
+        .exclude(status="paid")
+        .order_by().values("student_profile")
+    )
+    if profiles is None:
+        profiles = StudentProfile.objects.all()
+    elif not isinstance(profiles, QuerySet):
+        profiles = StudentProfile.objects.filter(pk__in=set(profiles))
+    return profiles.update(
+        outstanding_amount=Coalesce(Subquery(unpaid.annotate(total=Sum("amount")).values("total")), 0),
+        unpaid_months=Coalesce(Subquery(unpaid.annotate(n=Count("id")).values("n"), output_field=IntegerField()), 0),
+        last_payment_date=_last_payment_subquery(),
+        dues_through=through,
+    )
+
+
+def refresh_stale_balances():
+    """Bring forward students whose balance predates the current month."""
+    through = current_period()
+    stale = StudentProfile.objects.filter(Q(dues_through__lt=through) | Q(dues_through__isnull=True))
+    if not stale.exists():
+        return 0
+    return refresh_balances(stale, through)
@@ -0,0 +1,182 @@
+import hashlib
+import hmac
+import json
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .caching import invalidate_fee_summaries
+from .metrics import percentile
+from .models import FeeRecord, PaymentOrder, StudentProfile, User
+from .tokens import make_activation_token
+
+# Queries a view may run once the session user is cached. student_dashboard
+# is measured with a cold fee-summary cache.
+QUERY_BUDGETS = {
+    "admin_dashboard": 1,
+    "admin_bus_students": 3,
+    "admin_defaulters": 2,
+    "student_dashboard": 2,
+    "admin_view_student_fees": 3,
+}
+
+
+class Fixtures:
+    """The objects every benchmarked URL needs, taken from a seeded database."""
+
+    def __init__(self):
+        self.admin, _ = User.objects.get_or_create(username="bench-admin", defaults={"role": "admin"})
+        self.student = StudentProfile.objects.select_related("bus", "user").order_by("id").first()
+        self.pending = StudentProfile.objects.select_related("user").order_by("-id").first()
+        self.record = FeeRecord.objects.filter(student_profile=self.student).order_by("id").first()
+        self.order, _ = PaymentOrder.objects.get_or_create(
+            order_id="order_bench",
+            defaults={"student": self.student, "fee_record": self.record, "period": self.record.period, "amount": self.record.amount},
+        )
+
+
+def _signed_webhook():
+    body = json.dumps({"event": "payment.failed", "payload": {}}).encode()
+    signature = hmac.new(settings.RAZORPAY_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return body, {"HTTP_X_RAZORPAY_SIGNATURE": signature, "HTTP_X_RAZORPAY_EVENT_ID": f"evt_{uuid.uuid4().hex}"}
+
+
+def request_specs(f):
+    """``url name -> (role, method, args, body-factory)`` for every URL in core.urls."""
+    student_args = [f.student.id]
+    order_body = json.dumps({"period": f.record.period.isoformat(), "amount": f.record.amount})
+    verify_body = json.dumps({
+        "razorpay_order_id": f.order.order_id,
+        "razorpay_payment_id": "pay_bench",
+        "razorpay_signature": hmac.new(
+            (settings.RAZORPAY_KEY_SECRET or "").encode(), f"{f.order.order_id}|pay_bench".encode(), hashlib.sha256,
+        ).hexdigest(),
+    })
+    return {
+        "landing": (None, "get", [], None),
+        "login": (None, "get", [], None),
+        "logout": (None, "get", [], None),
+        "activate_account": (None, "get", [make_activation_token(f.pending.user)], None),
+        "student_dashboard": ("student", "get", [], None),
+        "upload_payment_proof": ("student", "get", [f.record.id], None),
+        "admin_dashboard": ("admin", "get", [], None),
+        "admin_bus_list": ("admin", "get", [], None),
+        "admin_add_bus": ("admin", "get", [], None),
+        "admin_bus_students": ("admin", "get", [f.student.bus.id], None),
+        "admin_ledger": ("admin", "get", [], None),
+        "admin_export_fees": ("admin", "get", [], None),
+        "admin_bulk_fee_update": ("admin", "get", [], None),
+        "admin_defaulters": ("admin", "get", [], None),
+        "admin_add_student": ("admin", "get", [f.student.bus.id], None),
+        "admin_import_students": ("admin", "get", [], None),
+        "admin_student_activation": ("admin", "get", student_args, None),
+        "admin_edit_student": ("admin", "get", student_args, None),
+        "admin_delete_student": ("admin", "get", student_args, None),
+        "admin_view_student_fees": ("admin", "get", student_args, None),
+        "admin_fee_update": ("admin", "get", student_args + [f.record.id], None),
+        "api_buses": ("admin", "get", [], None),
+        "api_students": ("admin", "get", [], None),
+        "api_fees": ("admin", "get", [], None),
+        "api_fee_status": ("student", "get", [], None),
+        "create_razorpay_order": ("student", "post", [], lambda: (order_body, {})),
+        "verify_payment": ("student", "post", [], lambda: (verify_body, {})),
+        "razorpay_webhook": (None, "post", [], _signed_webhook),
+    }
+
+
+def _clients(f):
+    admin = Client()
+    admin.force_login(f.admin)
+    student = Client()
+    student.force_login(f.student.user)
+    return {None: Client(), "admin": admin, "student": student}
+
+
+def _request(client, method, path, body):
+    if body is None:
+        response = getattr(client, method)(path)
+    else:
+        data, extra = body()
+        response = getattr(client, method)(path, data, content_type="application/json", **extra)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def cold_fee_summary(name, fixtures):
+    if name == "student_dashboard":
+        invalidate_fee_summaries([fixtures.student.id])
+
+
+def run_benchmarks(names, repeat=5, before_each=None):
+    """Time each URL ``repeat`` times; returns ``{name: stats}``.
+
+    The first request per URL warms caches and is not timed. Query counts
+    come from the last request.
+    """
+    fixtures = Fixtures()
+    specs = request_specs(fixtures)
+    missing = set(names) - set(specs)
+    if missing:
+        raise ValueError("No benchmark defined for: " + ", ".join(sorted(missing)))
+
+    clients = _clients(fixtures)
+    results = {}
+    for name in names:
+        role, method, args, body = specs[name]
+        path = reverse(name, args=args)
+        client = clients[role]
+        _request(client, method, path, body)
+
+        timings = []
+        for _ in range(repeat):
+            if before_each:
+                before_each(name, fixtures)
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = _request(client, method, path, body)
+                timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        results[name] = {
+            "status": response.status_code,
+            "median_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "queries": len(ctx.captured_queries),
+        }
+    return results
+
+
+def budget_violations(results):
+    return [
+        f"{name}: {results[name]['queries']} queries (budget {budget})"
+        for name, budget in QUERY_BUDGETS.items()
+        if name in results and results[name]["queries"] > budget
+    ]
+
+
+def compare(results, baseline, tolerance=1.5, min_delta_ms=2):
+    """Return human-readable regressions of ``results`` against ``baseline``.
+
+    A slower median only counts when it is both ``tolerance`` times the old one
+    and at least ``min_delta_ms`` slower, so sub-millisecond noise on trivial
+    pages doesn't fail the run.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["queries"] > previous["queries"]:
+            regressions.append(f"{name}: {previous['queries']} -> {current['queries']} queries")
+        slower = current["median_ms"] - previous["median_ms"]
+        if current["median_ms"] > previous["median_ms"] * tolerance and slower >= min_delta_ms:
+            regressions.append(f"{name}: median {previous['median_ms']}ms -> {current['median_ms']}ms")
+    return regressions
@@ -0,0 +1,137 @@
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.template import engines
+from django.urls import get_resolver, reverse
+
+from .models import Bus, StudentProfile, User
+from .tenants import default_school, tenant_context
+
+DEFAULTS = {
+    "ADMIN_USERNAME": "admin",
+    "ADMIN_EMAIL": "admin@example.com",
+    "ADMIN_PASSWORD": "admin123",
+    "DEMO_DATA": False,
+}
+
+DEMO_BUS_NUMBER = 1
+DEMO_STUDENT = "test_student"
+
+
+def bootstrap_setting(name):
+    return getattr(settings, "BOOTSTRAP", {}).get(name, DEFAULTS[name])
+
+
+def pending_migrations(database=DEFAULT_DB_ALIAS):
+    executor = MigrationExecutor(connections[database])
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+def ensure_admin():
+    """Create the admin account if it is missing and give it back its role
+    and flags if they were changed. Returns what was done, or None.
+
+    Checked with one query, so a boot that finds the account in order skips
+    the password hash entirely. The password only applies when the account
+    is created; change it later with ``manage.py changepassword``.
+    """
+    username = bootstrap_setting("ADMIN_USERNAME")
+    admin = User.all_objects.filter(username=username).first()
+    if admin is not None:
+        if (admin.role, admin.is_staff, admin.is_superuser) == ("admin", True, True):
+            return None
+        admin.role, admin.is_staff, admin.is_superuser = "admin", True, True
+        # save(), not update(), so the cached session user is dropped too.
+        admin.save(update_fields=["role", "is_staff", "is_superuser"])
+        return f"Restored the admin role of {username}."
+    try:
+        with transaction.atomic():
+            User.objects.create_superuser(
+                username, bootstrap_setting("ADMIN_EMAIL"), bootstrap_setting("ADMIN_PASSWORD"), role="admin",
+            )
+    except IntegrityError:
+        # Another instance booting at the same time got there first.
+        return None
+    return f"Created admin {username}."
+
+
+def ensure_demo_data():
+    """A test bus and student in the default school, for trying the site."""
+    school = default_school()
+    if school is None:
+        raise CommandError("Demo data goes in the default school; set TENANT_DEFAULT_SCHOOL to create it.")
+    if Bus.all_objects.filter(school=school, bus_number=DEMO_BUS_NUMBER).exists() and (
+        User.all_objects.filter(username=DEMO_STUDENT).exists()
+    ):
+        return None
+    with transaction.atomic(), tenant_context(school):
+        bus, _ = Bus.objects.get_or_create(
+            bus_number=DEMO_BUS_NUMBER,
+            defaults={"bus_name": "Test Route A", "driver_name": "Test Driver", "driver_phone": "9876543210"},
+        )
+        if not User.all_objects.filter(username=DEMO_STUDENT).exists():
+            user = User.objects.create_user(DEMO_STUDENT, password="password123", role="student")
+            StudentProfile.objects.create(
+                user=user,
+                full_name="Test Student",
+                student_class="10th Grade",
+                bus=bus,
+                pickup_location="Test Location",
+                bus_route="Test Route A",
+                monthly_fee=500,
+                parent_phone_number="1234567890",
+                address="Test Address",
+            )
+    return "Created demo bus and student."
+
+
+def bootstrap(demo_data=None, stdout=None):
+    """Bring the database up to date for this release: apply pending
+    migrations, then make sure the admin account (and, with ``demo_data``,
+    the demo rows) exist. Returns the list of things done; empty when the
+    database was already current, which costs a handful of queries.
+    """
+    done = []
+    plan = pending_migrations()
+    if plan:
+        call_command("migrate", interactive=False, verbosity=0, stdout=stdout)
+        done.append(f"Applied {len(plan)} migration(s).")
+    if demo_data is None:
+        demo_data = bootstrap_setting("DEMO_DATA")
+    steps = [ensure_admin] + ([ensure_demo_data] if demo_data else [])
+    done.extend(message for message in (step() for step in steps) if message)
+    return done
+
+
+def _count_patterns(patterns):
+    return sum(_count_patterns(p.url_patterns) if hasattr(p, "url_patterns") else 1 for p in patterns)
+
+
+def warm_up():
+    """Do the work a worker's first request would otherwise do: import every
+    view, build the URL resolver, compile the templates and cache the
+    default school.
+
+    Meant for the gunicorn master with ``preload_app`` (see
+    ``bus_fee_portal/gunicorn_conf.py``), so every forked worker starts with
+    all of it in memory. Database connections opened here are closed, since
+    a connection must not be shared with the forked workers.
+    Returns ``{"urls", "templates"}``.
+    """
+    try:
+        urls = _count_patterns(get_resolver().url_patterns)
+        reverse("login")
+        template_dir = Path(apps.get_app_config("core").path) / "templates"
+        names = sorted(path.relative_to(template_dir).as_posix() for path in template_dir.rglob("*.html"))
+        engine = engines["django"]
+        for name in names:
+            engine.get_template(name)
+        default_school()
+    finally:
+        connections.close_all()
+    return {"urls": urls, "templates": len(names)}
@@ -0,0 +1,188 @@
+import csv
+import io
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from .balances import refresh_balances
+from .fees import AcademicCalendar
+from .forms import StudentImportRowForm
+from .models import Bus, StudentProfile, FeeRecord
+from .tenants import new_row_school_id
+
+User = get_user_model()
+
+IMPORT_COLUMNS = [
+    "username",
+    "full_name",
+    "student_class",
+    "pickup_location",
+    "bus_route",
+    "monthly_fee",
+    "parent_phone_number",
+    "address",
+    "bus_number",
+    "joined_on",
+]
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class ImportFileError(Exception):
+    pass
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = []
+        self.errors = []
+        self.created = 0
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+
+def read_rows(fileobj, filename):
+    """Yield ``(line_number, row_dict)`` pairs from a CSV or XLSX upload."""
+    if filename.lower().endswith(".xlsx"):
+        yield from _read_xlsx(fileobj)
+    else:
+        yield from _read_csv(fileobj)
+
+
+def _read_csv(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    _check_header(reader.fieldnames or [])
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _read_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("Reading .xlsx files requires the openpyxl package.")
+
+    sheet = load_workbook(fileobj, read_only=True, data_only=True).active
+    rows = sheet.iter_rows(values_only=True)
+    header = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+    _check_header(header)
+    for line, values in enumerate(rows, start=2):
+        if not any(v not in (None, "") for v in values):
+            continue
+        yield line, {
+            key: "" if value is None else str(value)
+            for key, value in zip(header, values)
+        }
+
+
+def _check_header(header):
+    missing = [c for c in ("username", "full_name", "student_class", "bus_route", "bus_number") if c not in header]
+    if missing:
+        raise ImportFileError("Missing columns: " + ", ".join(missing))
+
+
+def validate_rows(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """Validate every row up front; nothing is written to the database."""
+    result = ImportResult()
+    seen = {}
+
+    for line, raw in rows:
+        data = {key: (raw.get(key) or "").strip() for key in IMPORT_COLUMNS}
+        form = StudentImportRowForm(data)
+        if not form.is_valid():
+            for field, messages in form.errors.items():
+                for message in messages:
+                    result.add_error(line, f"{field}: {message}")
+            continue
+
+        username = form.cleaned_data["username"]
+        if username in seen:
+            result.add_error(line, f"username: duplicates line {seen[username]}.")
+            continue
+        seen[username] = line
+        result.rows.append((line, form.cleaned_data))
+
+    usernames = list(seen)
+    for i in range(0, len(usernames), batch_size):
+        taken = User.all_objects.filter(username__in=usernames[i:i + batch_size]).values_list("username", flat=True)
+        for username in taken:
+            result.add_error(seen[username], "username: This username is already taken.")
+
+    # Students join the buses of the school they are imported into.
+    bus_numbers = {data["bus_number"] for _, data in result.rows}
+    buses = {bus.bus_number: bus for bus in Bus.all_objects.filter(school_id=new_row_school_id(), bus_number__in=bus_numbers)}
+    for line, data in result.rows:
+        if data["bus_number"] not in buses:
+            result.add_error(line, f"bus_number: Bus {data['bus_number']} does not exist.")
+        else:
+            data["bus"] = buses[data["bus_number"]]
+
+    result.errors.sort()
+    return result
+
+
+def import_students(result, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Insert the validated rows of ``result`` with batched bulk_create calls.
+
+    Everything happens in one transaction, so a failure part-way leaves the
+    database untouched.
+    """
+    if not result.ok:
+        return result
+
+    fee_calendar = AcademicCalendar.from_settings()
+    total = len(result.rows)
+
+    with transaction.atomic():
+        for start in range(0, total, batch_size):
+            batch = [data for _, data in result.rows[start:start + batch_size]]
+
+            users = User.objects.bulk_create([
+                User(username=data["username"], password=make_password(None), role="student", school_id=data["bus"].school_id)
+                for data in batch
+            ])
+            if not connection.features.can_return_rows_from_bulk_insert:
+                ids = dict(User.all_objects.filter(username__in=[u.username for u in users]).values_list("username", "id"))
+                for user in users:
+                    user.pk = ids[user.username]
+
+            profiles = StudentProfile.objects.bulk_create([
+                StudentProfile(
+                    user=user,
+                    school_id=data["bus"].school_id,
+                    full_name=data["full_name"],
+                    student_class=data["student_class"],
+                    pickup_location=data["pickup_location"] or None,
+                    bus_route=data["bus_route"],
+                    monthly_fee=data["monthly_fee"] or 0,
+                    parent_phone_number=data["parent_phone_number"] or None,
+                    address=data["address"] or None,
+                    bus=data["bus"],
+                    bus_number=data["bus"].bus_number,
+                    joined_on=data["joined_on"],
+                )
+                for user, data in zip(users, batch)
+            ])
+            if not connection.features.can_return_rows_from_bulk_insert:
+                ids = dict(StudentProfile.objects.filter(user__in=users).values_list("user_id", "id"))
+                for profile in profiles:
+                    profile.pk = ids[profile.user_id]
+
+            FeeRecord.objects.bulk_create(
+                [record for profile in profiles for record in profile.build_fee_records(fee_calendar)],
+                batch_size=batch_size,
+            )
+            refresh_balances(profile.pk for profile in profiles)
+
+            result.created += len(profiles)
+            if progress:
+                progress(result.created, total)
+
+    return result
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import StudentProfile
+
+FEE_SUMMARY_TIMEOUT = 60 * 60
+
+PROFILE_FIELDS = ["id", "full_name", "student_class", "bus_route", "bus_number", "monthly_fee", "updated_at"]
+RECORD_FIELDS = ["id", "period", "amount", "status", "updated_at"]
+
+
+# Each process has its own copy of these, so a signal in one worker (or in
+# the webhook process) can't drop an entry another worker still serves.
+PROCESS_LOCAL_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def cache_is_shared():
+    """True when every process sees the same default cache, so invalidation
+    reaches them all. Data that must never be stale is only cached then."""
+    return settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
+
+
+def fee_summary_key(profile_id):
+    return f"fee-summary:{profile_id}"
+
+
+def get_fee_summary(profile_id):
+    """Profile details and fee records for the student dashboard.
+
+    Built from two ``values()`` queries and, with a shared cache, cached
+    until a signal in ``core.signals`` drops it.
+    """
+    shared = cache_is_shared()
+    key = fee_summary_key(profile_id)
+    summary = cache.get(key) if shared else None
+    if summary is None:
+        profile = StudentProfile.objects.values(*PROFILE_FIELDS).get(pk=profile_id)
+        records = list(
+            StudentProfile(pk=profile_id).fee_records.order_by("id").values(*RECORD_FIELDS)
+        )
+        summary = {"profile": profile, "fee_records": records}
+        if shared:
+            cache.set(key, summary, FEE_SUMMARY_TIMEOUT)
+    return summary
+
+
+def invalidate_fee_summaries(profile_ids):
+    keys = [fee_summary_key(pk) for pk in set(profile_ids) if pk]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    # Drop it again once the transaction commits, in case a concurrent request
+    # re-cached the pre-commit data in between.
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,88 @@
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max, Q
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .caching import get_fee_summary
+from .models import Bus, StudentProfile
+
+
+def conditional_page(state_func):
+    """Answer repeat GETs with 304 when nothing on the page has changed.
+
+    ``state_func(request, *view_args, **view_kwargs)`` returns ``(last_modified,
+    version)`` from one cheap query (or the cache), or None if the object
+    doesn't exist. Both
+    the ``ETag`` and ``Last-Modified`` validators come from that single call,
+    so an unchanged page costs one query and no template rendering.
+    ``Cache-Control: private, no-cache`` makes browsers revalidate on every
+    visit rather than guess how long the page stays fresh.
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, "_page_state"):
+            request._page_state = state_func(request, *args, **kwargs)
+        return request._page_state
+
+    def etag(request, *args, **kwargs):
+        page_state = state(request, *args, **kwargs)
+        if page_state is None:
+            return None
+        # The page embeds the user and their CSRF token, so both are part of
+        # the tag: logging in again must not be answered with the old page.
+        parts = [request.user.pk, request.META.get("CSRF_COOKIE", ""), *page_state[1]]
+        return hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()[:32]
+
+    def last_modified(request, *args, **kwargs):
+        page_state = state(request, *args, **kwargs)
+        return page_state[0] if page_state else None
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def _state(row, *timestamps, counts=()):
+    if row is None:
+        return None
+    stamps = [row[name] for name in timestamps]
+    return max(stamp for stamp in stamps if stamp), [*stamps, *(row[name] for name in counts)]
+
+
+def student_dashboard_state(request):
+    # The fee summary is current in every process (see get_fee_summary), so
+    # it can answer without a query of its own; the view reuses it.
+    summary = request.fee_summary = get_fee_summary(request.student_profile_id)
+    stamps = [summary["profile"]["updated_at"], *(record["updated_at"] for record in summary["fee_records"])]
+    return max(stamps), [max(stamps), len(stamps)]
+
+
+def student_fees_state(request, student_id):
+    row = (
+        StudentProfile.objects.filter(pk=student_id).values("updated_at")
+        .annotate(
+            records_updated=Max("fee_records__updated_at"),
+            records=Count("fee_records"),
+            # Thumbnails appear once the background worker has processed a proof.
+            proofs_ready=Count("fee_records", filter=Q(fee_records__payment_proof__status="ready")),
+        )
+        .order_by("pk").first()
+    )
+    return _state(row, "updated_at", "records_updated", counts=["records", "proofs_ready"])
+
+
+def bus_students_state(request, bus_id):
+    row = (
+        Bus.objects.filter(pk=bus_id).values("updated_at")
+        .annotate(students_updated=Max("students__updated_at"), students=Count("students"))
+        .order_by("pk").first()
+    )
+    return _state(row, "updated_at", "students_updated", counts=["students"])
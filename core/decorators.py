@@ -1,17 +1,34 @@
 from django.shortcuts import redirect
 from functools import wraps
 
+from asgiref.sync import iscoroutinefunction
+
+
+def _redirect_for(user, required_role):
+    if not user.is_authenticated:
+        return redirect("login")
+    if getattr(user, "role", None) != required_role:
+        if getattr(user, "role", None) == "admin":
+            return redirect("admin_dashboard")
+        return redirect("student_dashboard")
+    return None
+
 
 def role_required(required_role):
     def decorator(view_func):
-        @wraps(view_func)
-        def wrapper(request, *args, **kwargs):
-            if not request.user.is_authenticated:
-                return redirect("login")
-            if getattr(request.user, "role", None) != required_role:
-                if getattr(request.user, "role", None) == "admin":
-                    return redirect("admin_dashboard")
-                return redirect("student_dashboard")
-            return view_func(request, *args, **kwargs)
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def wrapper(request, *args, **kwargs):
+                response = _redirect_for(await request.auser(), required_role)
+                if response:
+                    return response
+                return await view_func(request, *args, **kwargs)
+        else:
+            @wraps(view_func)
+            def wrapper(request, *args, **kwargs):
+                response = _redirect_for(request.user, required_role)
+                if response:
+                    return response
+                return view_func(request, *args, **kwargs)
         return wrapper
     return decorator
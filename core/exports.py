@@ -0,0 +1,67 @@
+import csv
+import zlib
+
+EXPORT_COLUMNS = [
+    ("id", "record_id"),
+    ("student_profile__full_name", "student"),
+    ("student_profile__student_class", "class"),
+    ("student_profile__bus__bus_number", "bus_number"),
+    ("student_profile__bus_route", "route"),
+    ("period", "period"),
+    ("amount", "amount"),
+    ("status", "status"),
+    ("verification_status", "verification_status"),
+    ("transaction_id", "transaction_id"),
+    ("payment_date", "payment_date"),
+]
+
+BUFFER_SIZE = 64 * 1024
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def fee_ledger_rows(records, chunk_size=2000):
+    """Yield the header and then one tuple per fee record.
+
+    Rows come from ``values_list(...).iterator()``, so no model instances are
+    built and only ``chunk_size`` rows are held in memory at a time.
+    """
+    yield [label for _, label in EXPORT_COLUMNS]
+    fields = [field for field, _ in EXPORT_COLUMNS]
+    yield from records.order_by("id").values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def csv_chunks(rows):
+    """Encode ``rows`` as CSV, yielding bytes in blocks of about BUFFER_SIZE.
+
+    The header is flushed on its own so the first byte goes out before the
+    query runs.
+    """
+    writer = csv.writer(_Echo())
+    rows = iter(rows)
+    yield writer.writerow(next(rows)).encode()
+
+    buffer = []
+    size = 0
+    for row in rows:
+        line = writer.writerow(row)
+        buffer.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            yield "".join(buffer).encode()
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,132 @@
+import calendar
+from datetime import date, datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .balances import refresh_balances
+from .caching import invalidate_fee_summaries
+from .models import FEE_MONTHS, FeeRecord
+
+MONTH_NUMBERS = {name: number for number, name in enumerate(calendar.month_name) if name}
+
+
+class AcademicCalendar:
+    """The billable months of one academic year, in billing order.
+
+    ``amount_overrides`` maps a month name to a fixed amount that replaces the
+    student's monthly fee for that month (e.g. ``{"December": 0}``).
+    """
+
+    def __init__(self, months=None, start_year=None, amount_overrides=None):
+        self.months = list(months or FEE_MONTHS)
+        unknown = [m for m in self.months if m not in MONTH_NUMBERS]
+        if unknown:
+            raise ValueError("Unknown month name(s): " + ", ".join(unknown))
+        self.amount_overrides = dict(amount_overrides or {})
+        self.start_year = start_year or self._current_start_year()
+
+    @classmethod
+    def from_settings(cls, start_year=None):
+        config = getattr(settings, "FEE_SCHEDULE", {})
+        return cls(
+            months=config.get("MONTHS"),
+            start_year=start_year or config.get("START_YEAR"),
+            amount_overrides=config.get("AMOUNT_OVERRIDES"),
+        )
+
+    def _current_start_year(self):
+        today = timezone.localdate()
+        first = MONTH_NUMBERS[self.months[0]]
+        return today.year if today.month >= first else today.year - 1
+
+    def periods(self):
+        """Yield ``(month_name, first_day)`` for every month in the schedule."""
+        year = self.start_year
+        previous = 0
+        for name in self.months:
+            number = MONTH_NUMBERS[name]
+            if number < previous:
+                year += 1
+            previous = number
+            yield name, date(year, number, 1)
+
+    def period_for(self, name):
+        """The billing period (first day of the month) for a month name."""
+        for month_name, first_day in self.periods():
+            if month_name == name:
+                return first_day
+        raise ValueError(f"{name} is not a billable month.")
+
+    def schedule(self, monthly_fee, joined_on=None):
+        """Return ``(period, amount)`` pairs for a student.
+
+        Months before ``joined_on`` are skipped and the joining month is
+        prorated by the days left in it.
+        """
+        result = []
+        for name, first_day in self.periods():
+            amount = self.amount_overrides.get(name, monthly_fee)
+            if joined_on:
+                if (first_day.year, first_day.month) < (joined_on.year, joined_on.month):
+                    continue
+                if (first_day.year, first_day.month) == (joined_on.year, joined_on.month):
+                    days = calendar.monthrange(first_day.year, first_day.month)[1]
+                    amount = round(amount * (days - joined_on.day + 1) / days)
+            result.append((first_day, amount))
+        return result
+
+
+def parse_period(value):
+    """Turn ``"2026-06"``, ``"2026-06-01"``, ``"June 2026"`` or ``"June"`` into
+    a billing period date.
+
+    A bare month name means that month in the current academic year.
+    """
+    if isinstance(value, date):
+        return value.replace(day=1)
+    value = str(value).strip()
+    for fmt in ("%Y-%m", "%Y-%m-%d", "%B %Y"):
+        try:
+            return datetime.strptime(value, fmt).date().replace(day=1)
+        except ValueError:
+            pass
+    return AcademicCalendar.from_settings().period_for(value.title())
+
+
+def period_choices(years=2):
+    """``(value, label)`` pairs for the billing periods of the current and
+    previous academic years."""
+    current = AcademicCalendar.from_settings()
+    choices = []
+    for start_year in range(current.start_year - years + 1, current.start_year + 1):
+        for _, first_day in AcademicCalendar.from_settings(start_year).periods():
+            choices.append((first_day.strftime("%Y-%m"), first_day.strftime("%B %Y")))
+    return choices
+
+
+def regenerate_fee_schedules(profiles, fee_calendar=None, batch_size=1000):
+    """Create any missing fee records for every profile in ``profiles``.
+
+    Existing records are left alone, so this is safe to re-run for a whole
+    bus or class. Returns the number of records attempted.
+    """
+    fee_calendar = fee_calendar or AcademicCalendar.from_settings()
+    records = []
+    attempted = 0
+    for profile in profiles.only("id", "school_id", "monthly_fee", "joined_on").iterator(chunk_size=batch_size):
+        records.extend(profile.build_fee_records(fee_calendar))
+        if len(records) >= batch_size:
+            attempted += _insert_missing(records)
+            records = []
+    if records:
+        attempted += _insert_missing(records)
+    return attempted
+
+
+def _insert_missing(records):
+    FeeRecord.objects.bulk_create(records, ignore_conflicts=True)
+    profile_ids = {record.student_profile_id for record in records}
+    refresh_balances(profile_ids)
+    invalidate_fee_summaries(profile_ids)
+    return len(records)
@@ -1,6 +1,8 @@
 from django import forms
 from django.contrib.auth import get_user_model
-from .models import StudentProfile, Bus
+from .fees import parse_period, period_choices
+from .models import StudentProfile, Bus, FeeRecord
+from .tenants import new_row_school_id
 
 User = get_user_model()
 
@@ -19,12 +21,14 @@ class AdminCreateStudentForm(forms.ModelForm):
             "monthly_fee",
             "parent_phone_number",
             "address",
+            "joined_on",
         ]
 
     def clean_username(self):
         username = self.cleaned_data["username"]
 
-        if User.objects.filter(username=username).exists():
+        # Usernames are unique across every school, not just this one.
+        if User.all_objects.filter(username=username).exists():
             raise forms.ValidationError("This username is already taken.")
 
         return username
@@ -34,7 +38,7 @@ class AdminCreateStudentForm(forms.ModelForm):
 
         user = User.objects.create_user(
             username=username,
-            password="password123",
+            password=None,
             role="student"
         )
 
@@ -59,6 +63,7 @@ class AdminEditStudentForm(forms.ModelForm):
             "monthly_fee",
             "parent_phone_number",
             "address",
+            "joined_on",
         ]
 
     def __init__(self, *args, **kwargs):
@@ -70,7 +75,7 @@ class AdminEditStudentForm(forms.ModelForm):
     def clean_username(self):
         new_username = self.cleaned_data["username"]
 
-        qs = User.objects.filter(username=new_username)
+        qs = User.all_objects.filter(username=new_username)
         if qs.exists() and qs.first().id != self.instance.user.id:
             raise forms.ValidationError("This username is already taken.")
 
@@ -92,3 +97,88 @@ class BusForm(forms.ModelForm):
     class Meta:
         model = Bus
         fields = ["bus_number", "bus_name", "driver_name", "driver_phone"]
+
+    def clean_bus_number(self):
+        bus_number = self.cleaned_data["bus_number"]
+        school_id = self.instance.school_id or new_row_school_id()
+        if Bus.all_objects.filter(school_id=school_id, bus_number=bus_number).exclude(pk=self.instance.pk).exists():
+            raise forms.ValidationError("A bus with this number already exists.")
+        return bus_number
+
+
+class PaymentProofForm(forms.Form):
+    screenshot = forms.ImageField(help_text="Photo or screenshot of the payment confirmation.")
+    transaction_id = forms.CharField(max_length=200, required=False, label="Transaction / UTR number")
+
+
+class StudentImportRowForm(forms.ModelForm):
+    username = forms.CharField(max_length=150, validators=[User.username_validator])
+
+    class Meta:
+        model = StudentProfile
+        fields = [
+            "full_name",
+            "student_class",
+            "pickup_location",
+            "bus_route",
+            "monthly_fee",
+            "parent_phone_number",
+            "address",
+            "bus_number",
+            "joined_on",
+        ]
+
+
+class StudentImportUploadForm(forms.Form):
+    file = forms.FileField(help_text="CSV or XLSX with a header row.")
+    dry_run = forms.BooleanField(required=False, help_text="Validate the file without saving anything.")
+
+
+def month_choices():
+    return [("", "Any month")] + period_choices()
+
+
+class LedgerFilterForm(forms.Form):
+    VIEW_CHOICES = (("fees", "Fee records"), ("students", "Students"))
+
+    view = forms.ChoiceField(choices=VIEW_CHOICES, required=False)
+    status = forms.ChoiceField(choices=(("", "Any status"),) + FeeRecord.STATUS_CHOICES, required=False)
+    month = forms.TypedChoiceField(choices=month_choices, coerce=parse_period, empty_value=None, required=False)
+    due_through = forms.TypedChoiceField(choices=month_choices, coerce=parse_period, empty_value=None, required=False)
+    student_class = forms.CharField(max_length=50, required=False)
+    bus = forms.IntegerField(min_value=1, required=False, label="Bus number")
+    route = forms.CharField(max_length=200, required=False)
+
+
+class DefaultersFilterForm(forms.Form):
+    student_class = forms.CharField(max_length=50, required=False)
+    bus = forms.IntegerField(min_value=1, required=False, label="Bus number")
+    route = forms.CharField(max_length=200, required=False)
+    min_months = forms.IntegerField(min_value=1, required=False, label="Unpaid months (at least)")
+
+
+class IdListField(forms.Field):
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        try:
+            return [int(v) for v in value or []]
+        except (TypeError, ValueError):
+            raise forms.ValidationError("Invalid selection.")
+
+
+class BulkFeeUpdateForm(forms.Form):
+    new_status = forms.ChoiceField(choices=FeeRecord.STATUS_CHOICES, label="Set status to")
+    payment_date = forms.DateTimeField(
+        required=False,
+        widget=forms.DateTimeInput(attrs={"type": "datetime-local"}),
+        help_text="For paid records; defaults to now.",
+    )
+    ids = IdListField(required=False)
+    apply_to_all = forms.BooleanField(required=False, label="Apply to every record matching the filters")
+
+    def clean(self):
+        cleaned = super().clean()
+        if not cleaned.get("ids") and not cleaned.get("apply_to_all"):
+            raise forms.ValidationError("Select some records, or choose to update every matching record.")
+        return cleaned
@@ -0,0 +1,266 @@
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import razorpay
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from .metrics import timer
+
+
+class GatewayError(Exception):
+    pass
+
+
+class GatewayUnavailable(GatewayError):
+    pass
+
+
+class GatewayRejected(GatewayError):
+    """The gateway answered with a client error, such as an unknown order id;
+    retrying won't help."""
+
+
+class CircuitBreaker:
+    """Stop calling the gateway for ``reset_timeout`` seconds after
+    ``failure_threshold`` consecutive failures, then let one call through to
+    probe whether it has recovered."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise GatewayUnavailable("Payment gateway is temporarily unavailable.")
+            # Half-open: allow this call, re-open immediately if it fails.
+            self.opened_at = None
+            self.failures = self.failure_threshold - 1
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class _TimeoutSession(requests.Session):
+    def __init__(self, timeout, pool_size):
+        super().__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+class BaseGateway:
+    """Async callers get the same API; the blocking HTTP call runs on the
+    gateway's own pool of ``pool_size`` threads so the event loop stays free
+    while the gateway responds. At most ``pool_size`` calls are in flight per
+    process; later ones wait for a free thread."""
+
+    pool_size = 10
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.pool_size, thread_name_prefix="gateway")
+        return self._executor
+
+    async def acreate_order(self, amount, currency="INR"):
+        return await sync_to_async(self.create_order, thread_sensitive=False, executor=self.executor)(amount, currency)
+
+    async def afetch_order(self, order_id):
+        return await sync_to_async(self.fetch_order, thread_sensitive=False, executor=self.executor)(order_id)
+
+    def captured_payment_id(self, order_id):
+        """Id of the captured payment for a paid order, or None."""
+        for payment in self.fetch_payments(order_id):
+            if payment.get("status") == "captured":
+                return payment["id"]
+        return None
+
+
+def _never_sent(exc):
+    """True for errors raised before the request was sent: a connect timeout
+    or a connection that could not be opened (refused, DNS). Any other
+    ConnectionError may come from a connection dropped after sending."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(exc, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+class RazorpayGateway(BaseGateway):
+    """Razorpay client sharing one pooled HTTP session for the whole process.
+
+    Amounts are in paise. Connection errors, timeouts and 5xx responses are
+    retried up to ``max_retries`` times with jittered exponential backoff;
+    client errors (bad request) are raised at once. Creating an order is
+    not idempotent, so it is only retried when the request never left this
+    process (see ``_never_sent``): a slow reply or a dropped connection may
+    mean the order exists, and a retry would create a second one.
+    """
+
+    RETRYABLE = (
+        requests.ConnectionError,
+        requests.Timeout,
+        razorpay.errors.ServerError,
+        razorpay.errors.GatewayError,
+    )
+
+    def __init__(self, key_id=None, key_secret=None, connect_timeout=3.05, read_timeout=10,
+                 max_retries=2, backoff=0.2, pool_size=10, failure_threshold=5, reset_timeout=30):
+        # One thread per pooled connection, so async calls never queue for one.
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        session = _TimeoutSession((connect_timeout, read_timeout), pool_size)
+        self.client = razorpay.Client(
+            session=session,
+            auth=(key_id or settings.RAZORPAY_KEY_ID, key_secret or settings.RAZORPAY_KEY_SECRET),
+        )
+
+    def _call(self, func, *args, retry_if=None):
+        self.breaker.before_call()
+        with timer("gateway"):
+            return self._call_with_retries(func, *args, retry_if=retry_if)
+
+    def _call_with_retries(self, func, *args, retry_if=None):
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = func(*args)
+            except razorpay.errors.BadRequestError as exc:
+                self.breaker.record_success()
+                raise GatewayRejected(str(exc)) from exc
+            except self.RETRYABLE as exc:
+                if attempt == self.max_retries or (retry_if and not retry_if(exc)):
+                    self.breaker.record_failure()
+                    raise GatewayError(str(exc) or exc.__class__.__name__) from exc
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+            else:
+                self.breaker.record_success()
+                return result
+
+    def create_order(self, amount, currency="INR"):
+        return self._call(self.client.order.create, {
+            "amount": amount,
+            "currency": currency,
+            "payment_capture": 1,
+        }, retry_if=_never_sent)
+
+    def fetch_order(self, order_id):
+        return self._call(self.client.order.fetch, order_id)
+
+    def fetch_payments(self, order_id):
+        return self._call(self.client.order.payments, order_id)["items"]
+
+
+class StubGateway(BaseGateway):
+    """In-process gateway for tests, local development and load tests.
+
+    Orders live in memory; ``latency`` (seconds) simulates a network round
+    trip. ``pay_order()`` plays the part of a student completing checkout.
+    """
+
+    def __init__(self, latency=0, pool_size=10, **options):
+        self.latency = latency
+        self.pool_size = pool_size
+        self.orders = {}
+        self.payments = {}
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        with timer("gateway"):
+            if self.latency:
+                time.sleep(self.latency)
+
+    def create_order(self, amount, currency="INR"):
+        self._wait()
+        order = {
+            "id": f"order_stub_{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": amount,
+            "currency": currency,
+            "status": "created",
+        }
+        with self._lock:
+            self.orders[order["id"]] = order
+        return dict(order)
+
+    def fetch_order(self, order_id):
+        self._wait()
+        with self._lock:
+            if order_id not in self.orders:
+                raise GatewayRejected(f"Unknown order {order_id}.")
+            return dict(self.orders[order_id])
+
+    def fetch_payments(self, order_id):
+        self._wait()
+        with self._lock:
+            return [dict(payment) for payment in self.payments.get(order_id, [])]
+
+    def pay_order(self, order_id, payment_id=None, captured=True):
+        with self._lock:
+            order = self.orders.setdefault(order_id, {"id": order_id, "entity": "order", "amount": 0, "currency": "INR"})
+            order["status"] = "paid" if captured else "attempted"
+            payment = {
+                "id": payment_id or f"pay_stub_{uuid.uuid4().hex[:14]}",
+                "entity": "payment",
+                "order_id": order_id,
+                "amount": order["amount"],
+                "status": "captured" if captured else "failed",
+            }
+            self.payments.setdefault(order_id, []).append(payment)
+        return payment["id"]
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Return the process-wide gateway configured in ``PAYMENT_GATEWAY``."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                config = getattr(settings, "PAYMENT_GATEWAY", {})
+                backend = import_string(config.get("BACKEND", "core.gateway.RazorpayGateway"))
+                _gateway = backend(**config.get("OPTIONS", {}))
+    return _gateway
+
+
+def reset_gateway(**kwargs):
+    global _gateway
+    if kwargs.get("setting") in (None, "PAYMENT_GATEWAY"):
+        _gateway = None
+
+
+setting_changed.connect(reset_gateway)
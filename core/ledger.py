@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .balances import refresh_balances
+from .caching import invalidate_fee_summaries
+from .models import FeeRecord, StudentProfile
+
+
+def filter_students(filters):
+    students = StudentProfile.objects.select_related("bus")
+    if filters.get("student_class"):
+        students = students.filter(student_class=filters["student_class"])
+    if filters.get("bus"):
+        students = students.filter(bus__bus_number=filters["bus"])
+    if filters.get("route"):
+        students = students.filter(bus_route=filters["route"])
+    return students
+
+
+def filter_fee_records(filters):
+    records = FeeRecord.objects.select_related("student_profile__bus")
+    if filters.get("status"):
+        records = records.filter(status=filters["status"])
+    if filters.get("month"):
+        records = records.filter(period=filters["month"])
+    if filters.get("due_through"):
+        records = records.filter(period__lte=filters["due_through"])
+    if filters.get("student_class"):
+        records = records.filter(student_profile__student_class=filters["student_class"])
+    if filters.get("bus"):
+        records = records.filter(student_profile__bus__bus_number=filters["bus"])
+    if filters.get("route"):
+        records = records.filter(student_profile__bus_route=filters["route"])
+    if filters.get("ids"):
+        records = records.filter(id__in=filters["ids"])
+    return records
+
+
+def has_filters(filters):
+    return any(filters.get(key) for key in ["status", "month", "due_through", "student_class", "bus", "route", "ids"])
+
+
+def bulk_set_status(records, status, payment_date=None, dry_run=False):
+    """Set ``status`` on every record in ``records`` with a single UPDATE.
+
+    Mirrors ``admin_fee_update``: paid records get ``payment_date`` (default
+    now) and a paid verification status, anything else clears both. Records
+    already in ``status`` are left alone. Returns ``{"matched", "updated",
+    "students"}``; with ``dry_run`` nothing is written and ``updated`` is
+    what would change.
+    """
+    now = timezone.now()
+    changes = {"status": status, "updated_at": now}
+    if status == "paid":
+        changes.update(verification_status="paid", payment_date=payment_date or now)
+    else:
+        changes.update(verification_status="unpaid", payment_date=None)
+
+    with transaction.atomic():
+        matched = records.count()
+        to_change = records.exclude(status=status)
+        student_ids = list(to_change.order_by().values_list("student_profile_id", flat=True).distinct())
+        if dry_run:
+            updated = to_change.count()
+        else:
+            updated = to_change.update(**changes)
+            refresh_balances(student_ids)
+            invalidate_fee_summaries(student_ids)
+
+    return {"matched": matched, "updated": updated, "students": len(student_ids)}
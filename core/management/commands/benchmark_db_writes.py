@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+MODES = {
+    "default": {
+        "pragmas": [],
+        "begin": "BEGIN",
+        "timeout": 5,
+    },
+    "tuned": {
+        "pragmas": ["PRAGMA journal_mode=WAL", "PRAGMA synchronous=NORMAL"],
+        "begin": "BEGIN IMMEDIATE",
+        "timeout": 20,
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent fee-update throughput on a scratch SQLite file with "
+        "Django's stock settings against the tuned WAL/IMMEDIATE settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--writes", type=int, default=200, help="Writes per thread.")
+        parser.add_argument("--rows", type=int, default=1000)
+
+    def handle(self, threads, writes, rows, **options):
+        for mode, config in MODES.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "bench.sqlite3")
+                self._prepare(path, config, rows)
+                elapsed, done, errors = self._run(path, config, threads, writes, rows)
+            self.stdout.write(
+                f"{mode:>8}: {done / elapsed:8.0f} writes/s  "
+                f"({done} ok, {errors} 'database is locked' errors, {elapsed:.2f}s)"
+            )
+
+    def _connect(self, path, config):
+        conn = sqlite3.connect(path, timeout=config["timeout"], isolation_level=None, check_same_thread=False)
+        for pragma in config["pragmas"]:
+            conn.execute(pragma)
+        return conn
+
+    def _prepare(self, path, config, rows):
+        conn = self._connect(path, config)
+        conn.execute("CREATE TABLE fee (id INTEGER PRIMARY KEY, status TEXT, amount INTEGER)")
+        conn.executemany("INSERT INTO fee (status, amount) VALUES ('unpaid', 500)", [()] * rows)
+        conn.close()
+
+    def _run(self, path, config, threads, writes, rows):
+        counts = {"done": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def worker(offset):
+            conn = self._connect(path, config)
+            done = errors = 0
+            for i in range(writes):
+                record_id = (offset * writes + i) % rows + 1
+                try:
+                    # Same shape as admin_fee_update: read the row, then write it.
+                    conn.execute(config["begin"])
+                    conn.execute("SELECT status FROM fee WHERE id = ?", (record_id,)).fetchone()
+                    conn.execute("UPDATE fee SET status = 'paid' WHERE id = ?", (record_id,))
+                    conn.execute("COMMIT")
+                    done += 1
+                except sqlite3.OperationalError:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    errors += 1
+            conn.close()
+            with lock:
+                counts["done"] += done
+                counts["errors"] += errors
+
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        return time.perf_counter() - started, counts["done"], counts["errors"]
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.bootstrap import bootstrap
+
+
+class Command(BaseCommand):
+    help = (
+        "Prepare the database on boot: apply pending migrations and make sure the "
+        "admin account exists. Returns at once when there is nothing to do."
+    )
+    # migrate runs the system checks itself when there is something to apply.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--demo-data", action="store_true", default=None,
+            help="Also create a test bus and student (default: BOOTSTRAP_DEMO_DATA).",
+        )
+
+    def handle(self, demo_data, **options):
+        started = time.perf_counter()
+        done = bootstrap(demo_data=demo_data, stdout=self.stdout)
+        for message in done:
+            self.stdout.write(message)
+        summary = "Bootstrapped" if done else "Nothing to do"
+        self.stdout.write(self.style.SUCCESS(f"{summary} in {time.perf_counter() - started:.2f}s."))
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.fees import parse_period
+from core.ledger import bulk_set_status, filter_fee_records, has_filters
+from core.tenants import school_for_command, tenant_context
+
+
+def _ids(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _date(value):
+    return timezone.make_aware(datetime.fromisoformat(value))
+
+
+class Command(BaseCommand):
+    help = (
+        "Set the status of every fee record matching the filters in one UPDATE, "
+        "e.g. --bus 12 --month 2026-06 --set paid after a cash collection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--set", dest="new_status", required=True, choices=["unpaid", "paid", "pending"])
+        parser.add_argument("--bus", type=int, help="Bus number.")
+        parser.add_argument("--class", dest="student_class")
+        parser.add_argument("--month", type=parse_period, help="Billing month, e.g. 2026-06 (a bare name like June means this academic year).")
+        parser.add_argument("--due-through", type=parse_period, help="Only months up to and including this one.")
+        parser.add_argument("--route")
+        parser.add_argument("--status", choices=["unpaid", "paid", "pending"], help="Only records currently in this status.")
+        parser.add_argument("--ids", type=_ids, help="Comma-separated fee record ids.")
+        parser.add_argument("--payment-date", type=_date, help="ISO date/time for paid records (default: now).")
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument("--school", help="Slug of the school to work in (default: every school, or the default school with --bus).")
+
+    def handle(self, new_status, payment_date, dry_run, school, **options):
+        if not has_filters(options):
+            raise CommandError("Give at least one filter; updating every fee record at once is not allowed.")
+
+        with tenant_context(school_for_command(school, options["bus"])):
+            summary = bulk_set_status(filter_fee_records(options), new_status, payment_date, dry_run=dry_run)
+        verb = "Would update" if dry_run else "Updated"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {summary['updated']} of {summary['matched']} matching fee record(s) "
+            f"across {summary['students']} student(s)."
+        ))
@@ -0,0 +1,30 @@
+import csv
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from core.models import StudentProfile
+from core.tenants import school_for_command, tenant_context
+from core.tokens import make_activation_token
+
+
+class Command(BaseCommand):
+    help = "Write a CSV of activation links for students who have not set a password yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", required=True, help="e.g. https://fees.example.com")
+        parser.add_argument("--bus", type=int, help="Bus number.")
+        parser.add_argument("--school", help="Slug of the school to work in (default: every school, or the default school with --bus).")
+
+    def handle(self, base_url, bus, school, **options):
+        with tenant_context(school_for_command(school, bus)):
+            students = StudentProfile.objects.select_related("user").filter(user__password__startswith=UNUSABLE_PASSWORD_PREFIX)
+            if bus is not None:
+                students = students.filter(bus__bus_number=bus)
+
+            writer = csv.writer(self.stdout)
+            writer.writerow(["username", "full_name", "parent_phone_number", "activation_link"])
+            for student in students.order_by("id").iterator(chunk_size=1000):
+                path = reverse("activate_account", args=[make_activation_token(student.user)])
+                writer.writerow([student.user.username, student.full_name, student.parent_phone_number, base_url.rstrip("/") + path])
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from core.exports import csv_chunks, fee_ledger_rows, gzip_chunks
+from core.fees import parse_period
+from core.ledger import filter_fee_records
+from core.routers import replica_reads
+from core.tenants import school_for_command, tenant_context
+
+
+class Command(BaseCommand):
+    help = "Stream the fee ledger as CSV to a file or stdout."
+
+    def add_arguments(self, parser):
+        parser.add_argument("-o", "--output", help="Output path (default: stdout).")
+        parser.add_argument("--bus", type=int, help="Bus number.")
+        parser.add_argument("--month", type=parse_period, help="Billing month, e.g. 2026-06 (a bare name like June means this academic year).")
+        parser.add_argument("--due-through", type=parse_period, help="Only months up to and including this one.")
+        parser.add_argument("--status", choices=["unpaid", "paid", "pending"])
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--school", help="Slug of the school to work in (default: every school, or the default school with --bus).")
+
+    def handle(self, output, gzip, chunk_size, school, **options):
+        school = school_for_command(school, options["bus"])
+        out = open(output, "wb") if output else sys.stdout.buffer
+        try:
+            # Querysets are scoped when they are built, so build them inside.
+            with tenant_context(school), replica_reads():
+                records = filter_fee_records(options)
+                chunks = csv_chunks(fee_ledger_rows(records, chunk_size=chunk_size))
+                if gzip:
+                    chunks = gzip_chunks(chunks)
+                for chunk in chunks:
+                    out.write(chunk)
+        finally:
+            if output:
+                out.close()
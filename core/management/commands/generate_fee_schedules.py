@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.fees import AcademicCalendar, regenerate_fee_schedules
+from core.models import StudentProfile
+from core.tenants import school_for_command, tenant_context
+
+
+class Command(BaseCommand):
+    help = "Create missing fee records for every student, or for one bus or class."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bus", type=int, help="Bus number.")
+        parser.add_argument("--class", dest="student_class")
+        parser.add_argument("--year", type=int, help="First calendar year of the academic year (default: current).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--school", help="Slug of the school to work in (default: every school, or the default school with --bus).")
+
+    def handle(self, bus, student_class, year, batch_size, school, **options):
+        with tenant_context(school_for_command(school, bus)):
+            profiles = StudentProfile.objects.all()
+            if bus is not None:
+                profiles = profiles.filter(bus__bus_number=bus)
+            if student_class:
+                profiles = profiles.filter(student_class=student_class)
+
+            fee_calendar = AcademicCalendar.from_settings(start_year=year)
+            attempted = regenerate_fee_schedules(profiles, fee_calendar, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Checked {attempted} fee record(s)."))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bulk_import import DEFAULT_BATCH_SIZE, ImportFileError, import_students, read_rows, validate_rows
+from core.tenants import school_for_command, tenant_context
+
+
+class Command(BaseCommand):
+    help = "Bulk-import students (and their fee records) from a CSV or XLSX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Validate the file without saving anything.")
+        parser.add_argument("--school", help="Slug of the school to work in (default: the default school).")
+
+    def handle(self, path, batch_size, dry_run, school, **options):
+        with tenant_context(school_for_command(school)):
+            self.import_file(path, batch_size, dry_run)
+
+    def import_file(self, path, batch_size, dry_run):
+        try:
+            with open(path, "rb") as f:
+                result = validate_rows(read_rows(f, path), batch_size=batch_size)
+        except (OSError, ImportFileError) as exc:
+            raise CommandError(str(exc))
+
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+        if not result.ok:
+            raise CommandError(f"{len(result.errors)} error(s); nothing was imported.")
+
+        self.stdout.write(f"{len(result.rows)} row(s) valid.")
+        if dry_run:
+            return
+
+        def progress(done, total):
+            self.stdout.write(f"  {done}/{total} students imported")
+
+        import_students(result, batch_size=batch_size, progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"Imported {result.created} student(s)."))
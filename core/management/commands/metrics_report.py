@@ -0,0 +1,64 @@
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from core.metrics import parse_log_line, percentile
+
+COLUMNS = ["total_ms", "db_ms", "template_ms", "gateway_ms"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarise core.metrics request logs into per-view p50/p95 timings. "
+        "Reads the given log files, or stdin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("logs", nargs="*", help="Log files written with REQUEST_METRICS=True.")
+        parser.add_argument("--sort", choices=COLUMNS + ["requests"], default="total_ms",
+                            help="Sort views by this column's p95 (default total_ms).")
+        parser.add_argument("--min-requests", type=int, default=1)
+
+    def handle(self, logs, sort, min_requests, **options):
+        by_view = defaultdict(list)
+        for line in self._lines(logs):
+            record = parse_log_line(line)
+            if record:
+                by_view[record.get("view") or record.get("path")].append(record)
+
+        rows = []
+        for view, records in by_view.items():
+            if len(records) < min_requests:
+                continue
+            row = {"view": view, "requests": len(records), "queries": max(r.get("queries", 0) for r in records)}
+            for column in COLUMNS:
+                values = sorted(r.get(column, 0) for r in records)
+                row[column] = (percentile(values, 50), percentile(values, 95))
+            rows.append(row)
+
+        if not rows:
+            self.stdout.write("No request metrics found.")
+            return
+
+        key = (lambda row: row["requests"]) if sort == "requests" else (lambda row: row[sort][1])
+        rows.sort(key=key, reverse=True)
+        width = max(len("view"), *(len(row["view"]) for row in rows))
+        header = f"{'view':<{width}}  {'reqs':>6}  {'max q':>5}" + "".join(
+            f"  {column[:-3] + ' p50/p95':>20}" for column in COLUMNS
+        )
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for row in rows:
+            self.stdout.write(
+                f"{row['view']:<{width}}  {row['requests']:>6}  {row['queries']:>5}"
+                + "".join(f"  {row[c][0]:>9.1f}/{row[c][1]:<10.1f}" for c in COLUMNS)
+            )
+
+    def _lines(self, logs):
+        if not logs:
+            yield from sys.stdin
+            return
+        for path in logs:
+            with open(path, encoding="utf-8") as fh:
+                yield from fh
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.proofs import process_pending_proofs
+
+
+class Command(BaseCommand):
+    help = "Re-encode uploaded payment screenshots and generate their thumbnails."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10)
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new uploads.")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds to sleep when nothing is queued.")
+
+    def handle(self, batch_size, loop, interval, **options):
+        total = 0
+        while True:
+            processed = process_pending_proofs(batch_size)
+            total += processed
+            if processed:
+                self.stdout.write(f"  processed {processed} proof(s)")
+            elif not loop:
+                break
+            else:
+                time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} proof(s)."))
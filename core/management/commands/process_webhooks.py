@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.webhooks import process_pending_events
+
+
+class Command(BaseCommand):
+    help = "Apply stored Razorpay webhook events to payment orders and fee records."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new events.")
+        parser.add_argument("--interval", type=float, default=2, help="Seconds to sleep when the inbox is empty.")
+
+    def handle(self, batch_size, loop, interval, **options):
+        total = 0
+        while True:
+            processed = process_pending_events(batch_size)
+            total += processed
+            if processed:
+                self.stdout.write(f"  processed {processed} event(s)")
+            elif not loop:
+                break
+            else:
+                time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} event(s)."))
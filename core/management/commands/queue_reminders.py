@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.fees import parse_period
+from core.ledger import filter_students
+from core.reminders import queue_reminders
+from core.tenants import school_for_command, tenant_context
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue a dues reminder for every student with unpaid fees, at most one per "
+        "student per billing month. Run send_reminders to deliver them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--period", type=parse_period, help="Remind about dues up to this month (default: this month).")
+        parser.add_argument("--bus", type=int, help="Bus number.")
+        parser.add_argument("--class", dest="student_class")
+        parser.add_argument("--route")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--school", help="Slug of the school to work in (default: every school, or the default school with --bus).")
+
+    def handle(self, period, chunk_size, school, **options):
+        with tenant_context(school_for_command(school, options["bus"])):
+            summary = queue_reminders(period, filter_students(options), chunk_size)
+        self.stdout.write(self.style.SUCCESS(
+            f"Queued {summary['queued']} reminder(s) after checking {summary['students']} student(s)."
+        ))
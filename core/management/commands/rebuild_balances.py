@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.balances import refresh_balances
+from core.fees import parse_period
+from core.ledger import filter_students
+from core.tenants import school_for_command, tenant_context
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every student's outstanding balance from the fee records. "
+        "Run after the month rolls over, or to repair totals after manual SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bus", type=int, help="Bus number.")
+        parser.add_argument("--class", dest="student_class")
+        parser.add_argument("--through", type=parse_period, help="Count unpaid months up to this one (default: this month).")
+        parser.add_argument("--school", help="Slug of the school to work in (default: every school, or the default school with --bus).")
+
+    def handle(self, through, school, **options):
+        started = time.perf_counter()
+        with tenant_context(school_for_command(school, options["bus"])):
+            students = filter_students(options).select_related(None)
+            updated = refresh_balances(students, through)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt balances for {updated} student(s) in {time.perf_counter() - started:.2f}s."
+        ))
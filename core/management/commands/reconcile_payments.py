@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.gateway import GatewayUnavailable
+from core.reconciliation import Checkpoint, reconcile_payments
+
+
+class Command(BaseCommand):
+    help = (
+        "Check payment orders still marked 'created' against the gateway, apply "
+        "captured payments and expire abandoned orders. Resumable: an interrupted "
+        "run continues from its checkpoint file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=8, help="Concurrent gateway requests.")
+        parser.add_argument("--min-age-minutes", type=int, default=15,
+                            help="Skip orders newer than this; the student may still be paying.")
+        parser.add_argument("--expire-after-hours", type=int, default=72,
+                            help="Mark never-attempted orders older than this as expired (0 to keep them).")
+        parser.add_argument("--checkpoint", default="reconcile_payments.checkpoint.json")
+        parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint.")
+
+    def handle(self, chunk_size, workers, min_age_minutes, expire_after_hours, checkpoint, restart, **options):
+        checkpoint = Checkpoint(checkpoint)
+        if restart:
+            checkpoint.clear()
+        elif checkpoint.load():
+            self.stdout.write(f"Resuming from {checkpoint.path} (after order #{checkpoint.load()['after_id']}).")
+
+        def progress(state, rate):
+            self.stdout.write(
+                f"  up to order #{state['after_id']}: {state['checked']} checked, "
+                f"{state['paid']} paid, {state['expired']} expired ({rate:.0f} orders/s)"
+            )
+
+        try:
+            summary = reconcile_payments(
+                chunk_size=chunk_size,
+                workers=workers,
+                min_age=timedelta(minutes=min_age_minutes),
+                expire_after=timedelta(hours=expire_after_hours) if expire_after_hours else None,
+                checkpoint=checkpoint,
+                progress=progress,
+            )
+        except GatewayUnavailable as exc:
+            raise CommandError(f"{exc} Progress is saved in {checkpoint.path}; run again to resume.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {summary['checked']} order(s): {summary['paid']} paid, {summary['expired']} expired, "
+            f"{summary['not_found']} not found at the gateway, {summary['errors']} gateway error(s) "
+            f"left for the next run. "
+            f"{summary['seconds']}s, {summary['per_second']} orders/s."
+        ))
@@ -0,0 +1,73 @@
+import json
+import platform
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from core import urls
+from core.benchmarks import budget_violations, cold_fee_summary, compare, run_benchmarks
+from core.seed import seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database, time every URL in core.urls and check "
+        "query budgets. Optionally compare against a previous results file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buses", type=int, default=100)
+        parser.add_argument("--students", type=int, default=20000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", default="bench_results.json")
+        parser.add_argument("--baseline", help="Results file from an earlier run.")
+        parser.add_argument("--tolerance", type=float, default=1.5,
+                            help="Allowed slowdown factor of the median before it counts as a regression.")
+
+    def handle(self, buses, students, repeat, output, baseline, tolerance, **options):
+        names = [p.name for p in urls.urlpatterns]
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stdout.write(f"Seeding {buses} buses / {students} students...")
+            seed_dataset(buses=buses, students=students)
+            # Budgets assume a cache shared by every worker, as in production;
+            # with the per-process default the user and fee summaries aren't cached.
+            with tempfile.TemporaryDirectory() as cache_dir, override_settings(
+                PAYMENT_GATEWAY={"BACKEND": "core.gateway.StubGateway"},
+                RAZORPAY_KEY_SECRET="benchmark",
+                RAZORPAY_WEBHOOK_SECRET="benchmark",
+                CACHES={"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": cache_dir}},
+            ):
+                results = run_benchmarks(names, repeat=repeat, before_each=cold_fee_summary)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<26} {row['status']:>4} {row['median_ms']:>9.2f}ms "
+                f"{row['p95_ms']:>9.2f}ms {row['queries']:>4}q"
+            )
+
+        with open(output, "w") as f:
+            json.dump({
+                "created": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "dataset": {"buses": buses, "students": students},
+                "results": results,
+            }, f, indent=2)
+        self.stdout.write(f"Wrote {output}")
+
+        problems = budget_violations(results)
+        if baseline:
+            with open(baseline) as f:
+                problems += compare(results, json.load(f)["results"], tolerance)
+        if problems:
+            raise CommandError("Benchmark regressions:\n  " + "\n  ".join(problems))
+        self.stdout.write(self.style.SUCCESS("All query budgets met."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.seed import seed_dataset
+from core.tenants import school_for_command, tenant_context
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic buses, students and fee records for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buses", type=int, default=100)
+        parser.add_argument("--students", type=int, default=20000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--school", help="Slug of the school to work in (default: the default school).")
+
+    def handle(self, buses, students, seed, school, **options):
+        def progress(done, total):
+            self.stdout.write(f"  {done}/{total} students")
+
+        with tenant_context(school_for_command(school)):
+            seed_dataset(buses=buses, students=students, seed=seed, progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"Created {buses} bus(es) and {students} student(s)."))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.reminders import TokenBucket, get_provider, reminder_setting, send_due_reminders
+
+
+class Command(BaseCommand):
+    help = "Send queued dues reminders through the configured provider, within its rate limit."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--rate", type=float, help="Messages per second (default: DUE_REMINDERS['RATE']).")
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new reminders.")
+        parser.add_argument("--interval", type=float, default=30, help="Seconds to sleep when the outbox is empty.")
+
+    def handle(self, batch_size, rate, loop, interval, **options):
+        if rate is not None and rate <= 0:
+            raise CommandError("--rate must be greater than 0.")
+        provider = get_provider()
+        # One bucket for the whole run, so the limit holds across batches.
+        bucket = TokenBucket(rate or reminder_setting("RATE"), reminder_setting("BURST"))
+        totals = {}
+        while True:
+            summary = send_due_reminders(batch_size, provider, bucket)
+            for key, value in summary.items():
+                totals[key] = totals.get(key, 0) + value
+            if summary["claimed"]:
+                self.stdout.write(
+                    f"  sent {summary['sent']}, retrying {summary['retrying']}, "
+                    f"failed {summary['failed']}, cancelled {summary['cancelled']}"
+                )
+            elif not loop:
+                break
+            else:
+                time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {totals['sent']} reminder(s); {totals['failed']} failed, {totals['cancelled']} no longer due."
+        ))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.routers import replica_alias
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto the replica SQLite file, to try "
+        "read-replica routing locally. Real replicas are kept in sync by the database server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep copying, like a lagging replica.")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds between copies.")
+
+    def handle(self, loop, interval, **options):
+        alias = replica_alias()
+        if alias is None:
+            raise CommandError("No replica configured; set REPLICA_DATABASE_URL.")
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if primary.vendor != "sqlite" or replica.vendor != "sqlite":
+            raise CommandError("sync_replica only copies between SQLite databases.")
+
+        while True:
+            started = time.perf_counter()
+            primary.ensure_connection()
+            replica.ensure_connection()
+            primary.connection.backup(replica.connection)
+            self.stdout.write(f"Copied primary to {alias} in {time.perf_counter() - started:.2f}s.")
+            if not loop:
+                break
+            time.sleep(interval)
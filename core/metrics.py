@@ -0,0 +1,164 @@
+import contextvars
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger("core.metrics")
+
+DEFAULTS = {
+    "SLOW_QUERY_MS": 100,
+    "DUPLICATE_QUERY_THRESHOLD": 3,
+}
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+def metrics_setting(name):
+    return getattr(settings, "REQUEST_METRICS", {}).get(name, DEFAULTS[name])
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class RequestMetrics:
+    """Timings gathered while one request is handled. Durations are in ms."""
+
+    def __init__(self):
+        self.queries = []
+        self.timers = Counter()
+        self._template_depth = 0
+
+    @property
+    def db_ms(self):
+        return sum(duration for _, duration in self.queries)
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed with connection.execute_wrapper().
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (time.perf_counter() - started) * 1000))
+
+    def slow_queries(self):
+        threshold = metrics_setting("SLOW_QUERY_MS")
+        return [(sql, duration) for sql, duration in self.queries if duration >= threshold]
+
+    def duplicate_queries(self):
+        """SQL run repeatedly with different parameters - usually an N+1 loop."""
+        threshold = metrics_setting("DUPLICATE_QUERY_THRESHOLD")
+        counts = Counter(sql for sql, _ in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count >= threshold]
+
+
+@contextmanager
+def collect():
+    """Record queries on every database connection and make the collector
+    current for ``timer()`` calls in this context."""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(metrics))
+            yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timer(name):
+    """Add the time spent in the block to ``name`` on the current request.
+
+    A no-op outside a request being measured, so callers like the payment
+    gateway can always use it.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timers[name] += (time.perf_counter() - started) * 1000
+
+
+_original_render = Template.render
+
+
+def _timed_render(self, context):
+    metrics = _current.get()
+    if metrics is None:
+        return _original_render(self, context)
+    # {% include %} and {% extends %} render nested templates; only time the outer one.
+    metrics._template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        metrics._template_depth -= 1
+        if not metrics._template_depth:
+            metrics.timers["template"] += (time.perf_counter() - started) * 1000
+
+
+def instrument_templates():
+    Template.render = _timed_render
+
+
+def server_timing(metrics, total_ms):
+    entries = [f'db;dur={metrics.db_ms:.1f};desc="{len(metrics.queries)} queries"']
+    entries += [f"{name};dur={duration:.1f}" for name, duration in sorted(metrics.timers.items())]
+    entries.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(entries)
+
+
+def log_request(request, response, metrics, total_ms):
+    match = request.resolver_match
+    record = {
+        "view": match.view_name if match else None,
+        "method": request.method,
+        "path": request.path,
+        "status": response.status_code,
+        "total_ms": round(total_ms, 2),
+        "db_ms": round(metrics.db_ms, 2),
+        "queries": len(metrics.queries),
+    }
+    record.update({f"{name}_ms": round(duration, 2) for name, duration in metrics.timers.items()})
+
+    slow = metrics.slow_queries()
+    duplicates = metrics.duplicate_queries()
+    record["slow_queries"] = len(slow)
+    record["duplicate_queries"] = sum(count for _, count in duplicates)
+    logger.info(json.dumps(record))
+
+    for sql, duration in slow:
+        logger.warning("Slow query (%.1fms) in %s: %s", duration, record["view"], sql)
+    for sql, count in duplicates:
+        logger.warning("Query run %d times in %s: %s", count, record["view"], sql)
+
+
+def parse_log_line(line):
+    """Return the request record logged by ``log_request``, or None.
+
+    Anything before the JSON object (timestamps, level) is ignored so the
+    report works with whatever formatter the log handler uses.
+    """
+    start = line.find("{")
+    if start == -1:
+        return None
+    try:
+        record = json.loads(line[start:])
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or "total_ms" not in record:
+        return None
+    return record
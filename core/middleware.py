@@ -0,0 +1,108 @@
+import time
+
+from django.http import Http404
+
+from . import metrics, routers, tenants
+from .models import StudentProfile
+
+SESSION_KEY = "student_profile_id"
+
+
+class TenantMiddleware:
+    """Serve each request for the school its host name resolves to.
+
+    Sets ``request.school`` and scopes every per-school query made while
+    handling the request to it (see ``core.tenants``). Hosts that match no
+    school get the default school, or a 404 when there is none. Put it
+    before the session and auth middleware so they run scoped too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.school = tenants.school_for_host(request.get_host())
+        if request.school is None:
+            raise Http404("No school is served at this address.")
+        with tenants.tenant_context(request.school):
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = tenants.within(request.school, response.streaming_content)
+        return response
+
+
+class StudentProfileMiddleware:
+    """Attach ``request.student_profile_id`` for logged-in students.
+
+    The id is looked up once per session and kept in it, so student views
+    don't need a profile query just to know whose data to show.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.student_profile_id = request.session.get(SESSION_KEY)
+        if request.student_profile_id is None and request.user.is_authenticated and request.user.role == "student":
+            request.student_profile_id = (
+                StudentProfile.objects.filter(user=request.user).values_list("id", flat=True).first()
+            )
+            if request.student_profile_id is not None:
+                request.session[SESSION_KEY] = request.student_profile_id
+        return self.get_response(request)
+
+
+class RequestMetricsMiddleware:
+    """Opt-in per-request instrumentation.
+
+    Records query count and database, template and payment-gateway time,
+    returns them in a ``Server-Timing`` header and logs one JSON line per
+    request to the ``core.metrics`` logger, plus a warning for each slow or
+    repeated query. ``manage.py metrics_report`` summarises the log.
+    Put it first in ``MIDDLEWARE`` so the total covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.instrument_templates()
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with metrics.collect() as collected:
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        response["Server-Timing"] = metrics.server_timing(collected, total_ms)
+        metrics.log_request(request, response, collected, total_ms)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Serve the views in ``DATABASE_REPLICA["VIEWS"]`` from the read replica.
+
+    A request that writes sets a short-lived cookie, and for ``PIN_SECONDS``
+    afterwards that browser reads from the primary, so a payment or an edit
+    shows up on the next page even if the replica is a little behind.
+    Does nothing when no replica database is configured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if routers.replica_alias() is None:
+            return self.get_response(request)
+
+        cookie = routers.replica_setting("PIN_COOKIE")
+        with routers.routing(pinned=cookie in request.COOKIES) as state:
+            request.db_routing = state
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = routers.within(state, response.streaming_content)
+        if state.wrote:
+            response.set_cookie(cookie, "1", max_age=routers.replica_setting("PIN_SECONDS"), httponly=True, samesite="Lax")
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = getattr(request, "db_routing", None)
+        if state and request.resolver_match.url_name in routers.replica_setting("VIEWS"):
+            state.use_replica = True
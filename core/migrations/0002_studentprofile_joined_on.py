@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentprofile',
+            name='joined_on',
+            field=models.DateField(blank=True, help_text='Leave empty for a full-year schedule.', null=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:01
+
+import core.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_webhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentProof',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('original', models.FileField(blank=True, upload_to=core.models.proof_upload_to)),
+                ('image', models.ImageField(blank=True, upload_to='payment_proofs/')),
+                ('thumbnail', models.ImageField(blank=True, upload_to='payment_proofs/thumbs/')),
+                ('original_size', models.PositiveIntegerField(default=0)),
+                ('image_size', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='proof_status_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='feerecord',
+            name='payment_proof',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='fee_records', to='core.paymentproof'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_paymentproof'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymentorder',
+            index=models.Index(fields=['status', 'id'], name='payment_order_status_idx'),
+        ),
+    ]
@@ -0,0 +1,114 @@
+import calendar
+from datetime import date
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+MONTH_NUMBERS = {name: number for number, name in enumerate(calendar.month_name) if name}
+DEFAULT_MONTHS = ["June", "July", "August", "September", "October", "November", "December", "January", "February", "March"]
+
+
+def _periods_by_name():
+    """Month name -> first day, for the academic year in ``FEE_SCHEDULE``.
+
+    The old records carry no year, so they are placed in the configured
+    START_YEAR, or the academic year running when the migration is applied.
+    """
+    config = getattr(settings, "FEE_SCHEDULE", {})
+    months = config.get("MONTHS") or DEFAULT_MONTHS
+    first = MONTH_NUMBERS[months[0]]
+    start_year = config.get("START_YEAR")
+    if not start_year:
+        today = timezone.localdate()
+        start_year = today.year if today.month >= first else today.year - 1
+    return {
+        name: date(start_year if number >= first else start_year + 1, number, 1)
+        for name, number in MONTH_NUMBERS.items()
+    }
+
+
+def forwards(apps, schema_editor):
+    periods = _periods_by_name()
+    for model_name in ["FeeRecord", "PaymentOrder"]:
+        model = apps.get_model("core", model_name)
+        for name in model.objects.values_list("month", flat=True).distinct():
+            period = periods.get(name.strip().title())
+            if period is None:
+                raise ValueError(f"Cannot convert {model_name}.month value {name!r} to a billing period.")
+            model.objects.filter(month=name).update(period=period)
+
+
+def backwards(apps, schema_editor):
+    for model_name in ["FeeRecord", "PaymentOrder"]:
+        model = apps.get_model("core", model_name)
+        for number, name in enumerate(calendar.month_name):
+            if name:
+                model.objects.filter(period__month=number).update(month=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_payment_order_status_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feerecord',
+            name='period',
+            field=models.DateField(null=True),
+        ),
+        migrations.AddField(
+            model_name='paymentorder',
+            name='period',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='feerecord',
+            unique_together=set(),
+        ),
+        migrations.RemoveIndex(
+            model_name='feerecord',
+            name='fee_status_month_idx',
+        ),
+        # On the way back the month columns are re-added as nullable and
+        # filled from the period before they become required again.
+        migrations.AlterField(
+            model_name='feerecord',
+            name='month',
+            field=models.CharField(max_length=50, null=True),
+        ),
+        migrations.AlterField(
+            model_name='paymentorder',
+            name='month',
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, backwards),
+        migrations.RemoveField(
+            model_name='feerecord',
+            name='month',
+        ),
+        migrations.RemoveField(
+            model_name='paymentorder',
+            name='month',
+        ),
+        migrations.AlterField(
+            model_name='feerecord',
+            name='period',
+            field=models.DateField(),
+        ),
+        migrations.AddConstraint(
+            model_name='feerecord',
+            constraint=models.UniqueConstraint(fields=('student_profile', 'period'), name='fee_student_period_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='feerecord',
+            index=models.Index(fields=['status', 'period', 'id'], name='fee_status_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feerecord',
+            index=models.Index(fields=['student_profile', 'status', 'period'], name='fee_student_status_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:10
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def compute_balances(apps, schema_editor):
+    FeeRecord = apps.get_model("core", "FeeRecord")
+    StudentProfile = apps.get_model("core", "StudentProfile")
+    through = timezone.localdate().replace(day=1)
+    unpaid = (
+        FeeRecord.objects.filter(student_profile=OuterRef("pk"), period__lte=through)
+        .exclude(status="paid")
+        .order_by().values("student_profile")
+    )
+    last_paid = (
+        FeeRecord.objects.filter(student_profile=OuterRef("pk"), status="paid")
+        .order_by().values("student_profile").annotate(last=Max("payment_date")).values("last")
+    )
+    StudentProfile.objects.update(
+        outstanding_amount=Coalesce(Subquery(unpaid.annotate(total=Sum("amount")).values("total")), 0),
+        unpaid_months=Coalesce(Subquery(unpaid.annotate(n=Count("id")).values("n"), output_field=IntegerField()), 0),
+        last_payment_date=Subquery(last_paid),
+        dues_through=through,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_billing_period'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentprofile',
+            name='dues_through',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='last_payment_date',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='outstanding_amount',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='unpaid_months',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['-outstanding_amount', 'id'], name='student_outstanding_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['dues_through'], name='student_dues_through_idx'),
+        ),
+        migrations.RunPython(compute_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,117 @@
+import core.models
+import django.contrib.auth.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def assign_default_school(apps, schema_editor):
+    """Put every existing row in one school, the install's default."""
+    School = apps.get_model("core", "School")
+    slug = getattr(settings, "TENANTS", {}).get("DEFAULT_SCHOOL") or "default"
+    school, _ = School.objects.get_or_create(slug=slug, defaults={"name": slug.replace("-", " ").title()})
+    for name in ["Bus", "StudentProfile", "FeeRecord"]:
+        apps.get_model("core", name).objects.update(school=school)
+    apps.get_model("core", "User").objects.filter(is_superuser=False).update(school=school)
+
+
+def school_field(related_name, null=False):
+    # The composite indexes below lead with school, so no index of its own.
+    return models.ForeignKey(db_index=False, null=null, on_delete=django.db.models.deletion.PROTECT, related_name=related_name, to='core.school')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='School',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('slug', models.SlugField(help_text='Served at <slug>.<TENANTS BASE_DOMAIN>.', unique=True)),
+                ('domain', models.CharField(blank=True, help_text='Optional custom host name.', max_length=255, null=True, unique=True)),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', core.models.SchoolUserManager()),
+                ('all_objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='bus',
+            name='school',
+            field=school_field('buses', null=True),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='school',
+            field=school_field('students', null=True),
+        ),
+        migrations.AddField(
+            model_name='feerecord',
+            name='school',
+            field=school_field('+', null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='school',
+            field=models.ForeignKey(blank=True, help_text='Leave empty for staff who work across every school.', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='users', to='core.school'),
+        ),
+        migrations.RunPython(assign_default_school, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='bus',
+            name='school',
+            field=school_field('buses'),
+        ),
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='school',
+            field=school_field('students'),
+        ),
+        migrations.AlterField(
+            model_name='feerecord',
+            name='school',
+            field=school_field('+'),
+        ),
+        # Bus numbers are only unique within a school.
+        migrations.AlterField(
+            model_name='bus',
+            name='bus_number',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AddConstraint(
+            model_name='bus',
+            constraint=models.UniqueConstraint(fields=('school', 'bus_number'), name='bus_school_number_uniq'),
+        ),
+        # School-wide lists now lead with the school column.
+        migrations.RemoveIndex(
+            model_name='feerecord',
+            name='fee_status_period_idx',
+        ),
+        migrations.AddIndex(
+            model_name='feerecord',
+            index=models.Index(fields=['school', 'status', 'period', 'id'], name='fee_status_period_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='studentprofile',
+            name='student_outstanding_idx',
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['school', '-outstanding_amount', 'id'], name='student_outstanding_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='studentprofile',
+            name='student_dues_through_idx',
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['school', 'dues_through'], name='student_dues_through_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_school'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bus',
+            name='driver_phone',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+    ]
@@ -1,24 +1,102 @@
 from django.conf import settings
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.utils import timezone
+
+from .tenants import current_school, new_row_school_id
+
+FEE_MONTHS = [
+    "June", "July", "August", "September", "October",
+    "November", "December", "January", "February", "March"
+]
+
+def current_period():
+    """The billing period (first day of the month) that is due today."""
+    return timezone.localdate().replace(day=1)
+
+
+class School(models.Model):
+    """A tenant. Each request is served for the school its host resolves to
+    (see core.tenants) and only sees that school's rows."""
+
+    name = models.CharField(max_length=200)
+    slug = models.SlugField(unique=True, help_text="Served at <slug>.<TENANTS BASE_DOMAIN>.")
+    domain = models.CharField(max_length=255, unique=True, blank=True, null=True, help_text="Optional custom host name.")
+
+    def __str__(self):
+        return self.name
+
+
+class SchoolScopedManager(models.Manager):
+    """Default manager of per-school models: inside a request (or a
+    ``tenant_context`` block) it only returns the current school's rows.
+    ``all_objects`` is the unscoped escape hatch."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        school = current_school()
+        return queryset.filter(school_id=school.pk) if school else queryset
+
+
+class SchoolUserManager(UserManager):
+    # Users without a school (superusers) can sign in at every school.
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        school = current_school()
+        if school:
+            queryset = queryset.filter(models.Q(school_id=school.pk) | models.Q(school__isnull=True))
+        return queryset
+
+    def create_superuser(self, username, email=None, password=None, **extra_fields):
+        extra_fields.setdefault("school", None)
+        return super().create_superuser(username, email, password, **extra_fields)
+
 
 class User(AbstractUser):
     ROLE_CHOICES = (("admin", "admin"), ("student", "student"))
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default="student")
+    school = models.ForeignKey(
+        School, on_delete=models.PROTECT, related_name="users", null=True, blank=True,
+        help_text="Leave empty for staff who work across every school.",
+    )
+
+    objects = SchoolUserManager()
+    all_objects = UserManager()
 
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.school_id is None and not self.is_superuser:
+            self.school_id = new_row_school_id()
+        super().save(*args, **kwargs)
+
 class Bus(models.Model):
-    bus_number = models.PositiveIntegerField(unique=True)
+    school = models.ForeignKey(School, on_delete=models.PROTECT, related_name="buses", db_index=False)
+    bus_number = models.PositiveIntegerField()
     bus_name = models.CharField(max_length=200)
     driver_name = models.CharField(max_length=200)
     driver_phone = models.CharField(max_length=20, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = SchoolScopedManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["school", "bus_number"], name="bus_school_number_uniq"),
+        ]
 
     def __str__(self):
         return f"Bus {self.bus_number} - {self.bus_name}"
 
+    def save(self, *args, **kwargs):
+        if self.school_id is None:
+            self.school_id = new_row_school_id()
+        super().save(*args, **kwargs)
+
 class StudentProfile(models.Model):
+    school = models.ForeignKey(School, on_delete=models.PROTECT, related_name="students", db_index=False)
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="student_profile")
     full_name = models.CharField(max_length=200)
     student_class = models.CharField(max_length=50)
@@ -29,29 +107,107 @@ class StudentProfile(models.Model):
     address = models.TextField(blank=True, null=True)
     bus = models.ForeignKey(Bus, on_delete=models.SET_NULL, null=True, blank=True, related_name="students")
     bus_number = models.PositiveIntegerField(default=1)
+    joined_on = models.DateField(blank=True, null=True, help_text="Leave empty for a full-year schedule.")
+    # Last edit to the profile itself; the balance columns below don't move it.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Kept in step with the fee records by core.balances: unpaid fees for
+    # periods up to and including dues_through.
+    outstanding_amount = models.IntegerField(default=0, editable=False)
+    unpaid_months = models.IntegerField(default=0, editable=False)
+    last_payment_date = models.DateTimeField(blank=True, null=True, editable=False)
+    dues_through = models.DateField(blank=True, null=True, editable=False)
+
+    objects = SchoolScopedManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        # Indexes used by school-wide lists lead with school, which every
+        # query made inside a request filters on; they also serve the
+        # foreign key, so it has no index of its own.
+        indexes = [
+            models.Index(fields=["bus", "full_name", "id"], name="student_bus_name_idx"),
+            models.Index(fields=["school", "-outstanding_amount", "id"], name="student_outstanding_idx"),
+            models.Index(fields=["school", "dues_through"], name="student_dues_through_idx"),
+        ]
 
     def __str__(self):
         return f"{self.full_name} ({self.student_class})"
 
-    def generate_fee_records(self):
-        months = [
-            "June", "July", "August", "September", "October",
-            "November", "December", "January", "February", "March"
+    def build_fee_records(self, fee_calendar=None):
+        from .fees import AcademicCalendar
+
+        fee_calendar = fee_calendar or AcademicCalendar.from_settings()
+        return [
+            FeeRecord(student_profile=self, school_id=self.school_id, period=period, amount=amount, status="unpaid")
+            for period, amount in fee_calendar.schedule(self.monthly_fee, self.joined_on)
         ]
-        for month in months:
-            FeeRecord.objects.get_or_create(
-                student_profile=self,
-                month=month,
-                defaults={"amount": self.monthly_fee, "status": "unpaid"}
-            )
+
+    def set_initial_balance(self, records):
+        """Fill the balance fields from new, unpaid ``records``."""
+        self.dues_through = current_period()
+        due = [record for record in records if record.period <= self.dues_through]
+        self.outstanding_amount = sum(record.amount for record in due)
+        self.unpaid_months = len(due)
 
     def save(self, *args, **kwargs):
         creating = self.pk is None
         if self.bus:
             self.bus_number = self.bus.bus_number
+            self.school_id = self.bus.school_id
+        elif self.school_id is None:
+            self.school_id = self.user.school_id or new_row_school_id()
+        if creating:
+            records = self.build_fee_records()
+            self.set_initial_balance(records)
         super().save(*args, **kwargs)
         if creating:
-            self.generate_fee_records()
+            FeeRecord.objects.bulk_create(records, ignore_conflicts=True)
+
+def proof_upload_to(instance, filename):
+    # Content-addressed, so the same screenshot is only ever stored once.
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else "bin"
+    return f"payment_proofs/originals/{instance.sha256[:2]}/{instance.sha256}.{extension}"
+
+
+class PaymentProof(models.Model):
+    STATUS_CHOICES = (
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("ready", "Ready"),
+        ("failed", "Failed"),
+    )
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    original = models.FileField(upload_to=proof_upload_to, blank=True)
+    image = models.ImageField(upload_to="payment_proofs/", blank=True)
+    thumbnail = models.ImageField(upload_to="payment_proofs/thumbs/", blank=True)
+    original_size = models.PositiveIntegerField(default=0)
+    image_size = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"], name="proof_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.status})"
+
+    @property
+    def display_url(self):
+        """The re-encoded image once it exists, the upload until then."""
+        field = self.image or self.original
+        return field.url if field else ""
+
+    @property
+    def thumbnail_url(self):
+        field = self.thumbnail or self.image or self.original
+        return field.url if field else ""
+
 
 class FeeRecord(models.Model):
     STATUS_CHOICES = (
@@ -61,25 +217,61 @@ class FeeRecord(models.Model):
     )
 
     student_profile = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name="fee_records")
-    month = models.CharField(max_length=50)
+    # Copied from the student, so ledger indexes can lead with it.
+    school = models.ForeignKey(School, on_delete=models.PROTECT, related_name="+", db_index=False)
+    # First day of the billed month.
+    period = models.DateField()
     amount = models.PositiveIntegerField(default=0)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="unpaid")
     transaction_id = models.CharField(max_length=200, blank=True, null=True)
     payment_screenshot = models.ImageField(upload_to="payment_proofs/", blank=True, null=True)
+    payment_proof = models.ForeignKey(PaymentProof, on_delete=models.SET_NULL, related_name="fee_records", blank=True, null=True)
     payment_date = models.DateTimeField(blank=True, null=True)
     verification_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="unpaid")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = SchoolScopedManager()
+    all_objects = models.Manager()
 
     class Meta:
-        unique_together = ("student_profile", "month")
         ordering = ["id"]
+        constraints = [
+            models.UniqueConstraint(fields=["student_profile", "period"], name="fee_student_period_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["school", "status", "period", "id"], name="fee_status_period_idx"),
+            models.Index(fields=["student_profile", "status", "period"], name="fee_student_status_idx"),
+        ]
 
     def __str__(self):
-        return f"{self.student_profile.full_name} - {self.month}"
+        return f"{self.student_profile.full_name} - {self.period:%B %Y}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the stored balance is based on, so core.balances can
+        # apply just the difference when the record is saved.
+        if {"status", "amount", "period"} <= set(field_names):
+            instance._saved_balance_state = instance.balance_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._saved_balance_state = self.balance_state()
+
+    def save(self, *args, **kwargs):
+        if self.school_id is None:
+            self.school_id = self.student_profile.school_id
+        super().save(*args, **kwargs)
+
+    def balance_state(self):
+        return self.status, self.amount, self.period
+
 
 class PaymentOrder(models.Model):
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name="payment_orders")
     fee_record = models.ForeignKey(FeeRecord, on_delete=models.CASCADE, related_name="payment_orders", null=True, blank=True)
-    month = models.CharField(max_length=20)
+    period = models.DateField(blank=True, null=True)
     amount = models.PositiveIntegerField()
     order_id = models.CharField(max_length=255, unique=True)
     payment_id = models.CharField(max_length=255, blank=True, null=True)
@@ -87,5 +279,64 @@ class PaymentOrder(models.Model):
     status = models.CharField(max_length=20, default="created")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"], name="payment_order_status_idx"),
+        ]
+
+    def __str__(self):
+        period = f"{self.period:%B %Y}" if self.period else "-"
+        return f"{self.student.full_name} - {period} - {self.status}"
+
+
+class WebhookEvent(models.Model):
+    event_id = models.CharField(max_length=100, unique=True)
+    payload = models.TextField()
+    event_type = models.CharField(max_length=100, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["processed_at", "id"], name="webhook_pending_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.event_id} ({self.event_type or 'unprocessed'})"
+
+
+class DueReminder(models.Model):
+    """Outbox of dues reminders to parents, one per student per billing period."""
+
+    STATUS_CHOICES = (
+        ("queued", "Queued"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("cancelled", "Cancelled"),
+        ("failed", "Failed"),
+    )
+
+    student_profile = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name="reminders")
+    period = models.DateField()
+    phone = models.CharField(max_length=20)
+    message = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    provider_message_id = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["student_profile", "period"], name="reminder_student_period_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at", "id"], name="reminder_pending_idx"),
+        ]
+
     def __str__(self):
-        return f"{self.student.full_name} - {self.month} - {self.status}"
+        return f"{self.student_profile.full_name} - {self.period:%B %Y} - {self.status}"
@@ -0,0 +1,108 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor.")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Malformed cursor.")
+    return values
+
+
+def _model_field(model, path):
+    for part in path.split("__"):
+        field = model._meta.get_field(part)
+        model = field.related_model
+    return field
+
+
+def _cursor_values(model, ordering, values):
+    """``values`` converted to the types of the ``ordering`` fields; a cursor
+    is user input, so anything that doesn't fit is an ``InvalidCursor``."""
+    converted = []
+    for field, value in zip(ordering, values):
+        try:
+            value = _model_field(model, field.lstrip("-")).to_python(value)
+        except (ValidationError, ValueError, TypeError):
+            raise InvalidCursor("Malformed cursor.")
+        if value is None:
+            raise InvalidCursor("Malformed cursor.")
+        converted.append(value)
+    return converted
+
+
+def _seek(ordering, values):
+    # (a, b, c) > (x, y, z)  ==  a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+    # with "<" instead of ">" for descending ("-a") fields.
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        step = Q(**{f"{name}__{lookup}": values[i]})
+        for prev_field, prev_value in zip(ordering[:i], values[:i]):
+            step &= Q(**{prev_field.lstrip("-"): prev_value})
+        condition |= step
+    return condition
+
+
+def _value(item, field):
+    field = field.lstrip("-")
+    if isinstance(item, dict):
+        return item[field]
+    for part in field.split("__"):
+        item = getattr(item, part)
+    return item
+
+
+def keyset_page(queryset, ordering, cursor=None, per_page=50):
+    """Return one page of ``queryset`` using seek pagination.
+
+    ``ordering`` is a list of field names, ``"-"``-prefixed for descending,
+    that must end in a unique field (normally ``"id"``). The page is found
+    with a ``WHERE`` on the last row seen instead of an ``OFFSET``, so every
+    page costs the same no matter how deep it is.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = _cursor_values(queryset.model, ordering, decode_cursor(cursor, len(ordering)))
+        queryset = queryset.filter(_seek(ordering, values))
+
+    items = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = encode_cursor([_value(items[-1], field) for field in ordering])
+    return KeysetPage(items, next_cursor)
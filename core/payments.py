@@ -0,0 +1,38 @@
+from django.utils import timezone
+
+from .balances import refresh_balances
+from .caching import invalidate_fee_summaries
+from .models import FeeRecord, PaymentOrder
+
+
+def apply_captured_payments(payments):
+    """Mark orders and their fee records paid, given ``{order_id: payment_id}``.
+
+    Works on the whole batch with two reads and two bulk updates. Orders and
+    records that are already paid are skipped, so replaying the same
+    payments is harmless. Returns the number of orders updated.
+    """
+    if not payments:
+        return 0
+
+    orders = list(PaymentOrder.objects.filter(order_id__in=list(payments)).exclude(status="paid"))
+    for order in orders:
+        order.status = "paid"
+        order.payment_id = order.payment_id or payments[order.order_id]
+    PaymentOrder.objects.bulk_update(orders, ["status", "payment_id"])
+
+    payment_for_record = {order.fee_record_id: order.payment_id for order in orders if order.fee_record_id}
+    records = list(FeeRecord.objects.filter(id__in=list(payment_for_record)).exclude(status="paid"))
+    now = timezone.now()
+    for record in records:
+        record.status = "paid"
+        record.verification_status = "paid"
+        record.payment_date = now
+        record.transaction_id = payment_for_record[record.id]
+        record.updated_at = now
+    FeeRecord.objects.bulk_update(records, ["status", "verification_status", "payment_date", "transaction_id", "updated_at"])
+    student_ids = {order.student_id for order in orders}
+    refresh_balances(student_ids)
+    invalidate_fee_summaries(student_ids)
+
+    return len(orders)
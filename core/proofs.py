@@ -0,0 +1,171 @@
+import hashlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from .models import PaymentProof
+
+DEFAULTS = {
+    "MAX_UPLOAD_SIZE": 15 * 1024 * 1024,
+    "MAX_DIMENSION": 1600,
+    "MAX_BYTES": 300 * 1024,
+    "THUMBNAIL_SIZE": 320,
+    "QUALITY": 80,
+    "KEEP_ORIGINALS": False,
+    "PROCESS_IN_THREAD": True,
+    "STALE_AFTER": 600,
+}
+
+MIN_QUALITY = 40
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="payment-proofs")
+
+
+def proof_setting(name):
+    return getattr(settings, "PAYMENT_PROOFS", {}).get(name, DEFAULTS[name])
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads to a temporary file on disk, hashing them on the way.
+
+    The uploaded file gets a ``sha256`` attribute. Files larger than
+    ``MAX_UPLOAD_SIZE`` are dropped mid-stream and ``too_large`` is set.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.too_large = False
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > proof_setting("MAX_UPLOAD_SIZE"):
+            self.too_large = True
+            raise SkipFile
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.sha256 = self.digest.hexdigest()
+        return upload
+
+
+def store_upload(upload):
+    """Return ``(proof, created)`` for a file read by ``HashingUploadHandler``.
+
+    Content already on file is not stored again; the existing proof is
+    returned instead.
+    """
+    proof = PaymentProof.objects.filter(sha256=upload.sha256).first()
+    if proof is not None:
+        return proof, False
+    try:
+        with transaction.atomic():
+            proof = PaymentProof.objects.create(sha256=upload.sha256, original=upload, original_size=upload.size)
+    except IntegrityError:
+        return PaymentProof.objects.get(sha256=upload.sha256), False
+    return proof, True
+
+
+def enqueue(proof):
+    """Process new proofs in a background thread once the upload commits.
+
+    With ``PROCESS_IN_THREAD`` off, ``manage.py process_payment_proofs``
+    picks them up instead.
+    """
+    if proof_setting("PROCESS_IN_THREAD"):
+        transaction.on_commit(lambda: _executor.submit(_process_in_thread))
+
+
+def _process_in_thread():
+    try:
+        while process_pending_proofs():
+            pass
+    finally:
+        connections.close_all()
+
+
+def output_format():
+    return "WEBP" if features.check("webp") else "JPEG"
+
+
+def _encode(image, max_side, fmt, quality, max_bytes=None):
+    """Resize to fit ``max_side`` and encode, lowering quality (then size)
+    until the result fits in ``max_bytes``."""
+    image = image.copy()
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    while True:
+        buffer = io.BytesIO()
+        if fmt == "WEBP":
+            image.save(buffer, fmt, quality=quality, method=4)
+        else:
+            image.save(buffer, fmt, quality=quality, optimize=True, progressive=True)
+        if max_bytes is None or buffer.tell() <= max_bytes or max(image.size) <= 200:
+            return buffer.getvalue()
+        if quality > MIN_QUALITY:
+            quality -= 10
+        else:
+            image.thumbnail((image.width * 3 // 4, image.height * 3 // 4), Image.Resampling.LANCZOS)
+
+
+def process_proof(proof):
+    """Re-encode ``proof.original`` into a size-capped image and a thumbnail."""
+    fmt = output_format()
+    max_side = proof_setting("MAX_DIMENSION")
+    quality = proof_setting("QUALITY")
+    try:
+        with proof.original.open("rb") as fh, Image.open(fh) as source:
+            # JPEG can decode straight to a smaller size, which is much faster for phone photos.
+            source.draft("RGB", (max_side, max_side))
+            image = ImageOps.exif_transpose(source).convert("RGB")
+        image_bytes = _encode(image, max_side, fmt, quality, proof_setting("MAX_BYTES"))
+        thumb_bytes = _encode(image, proof_setting("THUMBNAIL_SIZE"), fmt, quality)
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        proof.status = "failed"
+        proof.error = f"{exc.__class__.__name__}: {exc}"
+        proof.save(update_fields=["status", "error"])
+        return proof
+
+    name = f"{proof.sha256}.{'webp' if fmt == 'WEBP' else 'jpg'}"
+    proof.image.save(name, ContentFile(image_bytes), save=False)
+    proof.thumbnail.save(name, ContentFile(thumb_bytes), save=False)
+    proof.image_size = len(image_bytes)
+    if not proof_setting("KEEP_ORIGINALS"):
+        proof.original.delete(save=False)
+    proof.status = "ready"
+    proof.error = ""
+    proof.save(update_fields=["image", "thumbnail", "image_size", "original", "status", "error"])
+    return proof
+
+
+def process_pending_proofs(batch_size=10):
+    """Claim and process one batch of unprocessed proofs; returns its size.
+
+    Rows are claimed with an UPDATE rather than held under a row lock, so the
+    database isn't locked while images are encoded. Claims older than
+    ``STALE_AFTER`` seconds (a crashed worker) are picked up again.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=proof_setting("STALE_AFTER"))
+    claimable = Q(status="pending") | Q(status="processing", claimed_at__lt=stale)
+    ids = list(PaymentProof.objects.filter(claimable).order_by("id").values_list("id", flat=True)[:batch_size])
+    if not ids:
+        return 0
+    PaymentProof.objects.filter(claimable, id__in=ids).update(status="processing", claimed_at=now)
+    proofs = list(PaymentProof.objects.filter(id__in=ids, status="processing", claimed_at=now).order_by("id"))
+    for proof in proofs:
+        process_proof(proof)
+    return len(proofs)
@@ -0,0 +1,130 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .gateway import GatewayError, GatewayRejected, GatewayUnavailable, get_gateway
+from .models import PaymentOrder
+from .payments import apply_captured_payments
+
+
+class Checkpoint:
+    """Progress of a reconciliation run, kept in a small JSON file so an
+    interrupted run resumes after the last completed chunk."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, state):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(state, fh)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def gateway_state(gateway, order_id):
+    """``(order_id, status, payment_id)`` as the gateway sees the order.
+
+    Orders the gateway rejects as unknown come back with status
+    ``"not_found"``, and those it failed to answer for (timeouts, 5xx) with
+    ``"error"``, to be retried by a later run. An open circuit breaker is
+    raised so the run stops instead of marking everything as failed.
+    """
+    try:
+        status = gateway.fetch_order(order_id)["status"]
+        payment_id = gateway.captured_payment_id(order_id) if status == "paid" else None
+    except GatewayUnavailable:
+        raise
+    except GatewayRejected:
+        return order_id, "not_found", None
+    except GatewayError:
+        return order_id, "error", None
+    return order_id, status, payment_id
+
+
+def reconcile_payments(gateway=None, chunk_size=200, workers=8, min_age=timedelta(minutes=15),
+                       expire_after=timedelta(hours=72), checkpoint=None, progress=None):
+    """Settle orders still ``created`` locally against their gateway state.
+
+    Orders are read in id order, ``chunk_size`` at a time, and looked up with
+    up to ``workers`` concurrent gateway calls. Per chunk, captured payments
+    are applied with ``apply_captured_payments`` and orders never attempted
+    for longer than ``expire_after`` are marked ``expired``, both in one
+    transaction, after which the checkpoint moves past the chunk. Orders
+    younger than ``min_age`` are left to the checkout still in progress.
+
+    Returns ``{"checked", "paid", "expired", "not_found", "errors",
+    "seconds", "per_second"}``; counts include any earlier runs resumed from the
+    checkpoint, the timings cover this run only.
+    """
+    gateway = gateway or get_gateway()
+    now = timezone.now()
+    state = checkpoint.load() if checkpoint else {}
+    if not state:
+        until_id = PaymentOrder.objects.aggregate(last=Max("id"))["last"] or 0
+        state = {"after_id": 0, "until_id": until_id, "checked": 0, "paid": 0, "expired": 0, "errors": 0}
+    # Checkpoints written before not-found orders were counted apart lack the key.
+    state.setdefault("not_found", 0)
+
+    unresolved = PaymentOrder.objects.filter(
+        status="created",
+        id__lte=state["until_id"],
+        created_at__lte=now - min_age,
+    ).order_by("id")
+    expire_before = now - expire_after if expire_after else None
+
+    started = time.perf_counter()
+    checked = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reconcile") as pool:
+        while True:
+            chunk = list(unresolved.filter(id__gt=state["after_id"]).values_list("id", "order_id", "created_at")[:chunk_size])
+            if not chunk:
+                break
+            created = {order_id: created_at for _, order_id, created_at in chunk}
+            results = list(pool.map(lambda order_id: gateway_state(gateway, order_id), created))
+
+            payments = {order_id: payment_id for order_id, status, payment_id in results if payment_id}
+            expired = [
+                order_id for order_id, status, _ in results
+                if status == "created" and expire_before and created[order_id] < expire_before
+            ]
+            with transaction.atomic():
+                state["paid"] += apply_captured_payments(payments)
+                if expired:
+                    state["expired"] += PaymentOrder.objects.filter(order_id__in=expired, status="created").update(status="expired")
+
+            checked += len(chunk)
+            state["checked"] += len(chunk)
+            state["not_found"] += sum(1 for _, status, _ in results if status == "not_found")
+            state["errors"] += sum(1 for _, status, _ in results if status == "error")
+            state["after_id"] = chunk[-1][0]
+            if checkpoint:
+                checkpoint.save(state)
+            if progress:
+                progress(state, checked / (time.perf_counter() - started))
+
+    if checkpoint:
+        checkpoint.clear()
+    summary = {key: state[key] for key in ["checked", "paid", "expired", "not_found", "errors"]}
+    elapsed = time.perf_counter() - started
+    summary["seconds"] = round(elapsed, 2)
+    summary["per_second"] = round(checked / elapsed, 1) if checked else 0
+    return summary
@@ -0,0 +1,308 @@
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import DueReminder, FeeRecord, StudentProfile, current_period
+
+DEFAULTS = {
+    "BACKEND": "core.reminders.ConsoleProvider",
+    "OPTIONS": {},
+    "RATE": 1.0,
+    "BURST": 10,
+    "MAX_ATTEMPTS": 5,
+    "RETRY_BACKOFF": 60,
+    "STALE_AFTER": 600,
+    "MESSAGE": (
+        "Dear parent, the school bus fee for {name} of Rs {amount} ({months}) is due. "
+        "Please pay through the school portal."
+    ),
+}
+
+
+def reminder_setting(name):
+    return getattr(settings, "DUE_REMINDERS", {}).get(name, DEFAULTS[name])
+
+
+class ReminderError(Exception):
+    """A send that failed but may succeed if retried later."""
+
+
+class InvalidRecipient(ReminderError):
+    """A send that will never succeed, such as a malformed number."""
+
+
+class BaseProvider:
+    """Delivers reminder messages. Providers with a bulk API override
+    ``send_batch``; the rest only need ``send``."""
+
+    max_batch_size = 50
+
+    def send(self, phone, text):
+        """Send one message and return the provider's id for it."""
+        raise NotImplementedError
+
+    def send_batch(self, messages):
+        """Send ``(phone, text)`` pairs; returns a message id or a
+        ``ReminderError`` for each, in order."""
+        results = []
+        for phone, text in messages:
+            try:
+                results.append(self.send(phone, text))
+            except ReminderError as exc:
+                results.append(exc)
+        return results
+
+
+class ConsoleProvider(BaseProvider):
+    """Prints messages instead of sending them; for development."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, phone, text):
+        message_id = f"console_{uuid.uuid4().hex[:14]}"
+        self.stream.write(f"[{message_id}] to {phone}: {text}\n")
+        return message_id
+
+
+class FileProvider(BaseProvider):
+    """Appends each batch of messages to a JSON-lines file; for testing."""
+
+    max_batch_size = 500
+
+    def __init__(self, path="reminders.jsonl"):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send_batch(self, messages):
+        sent_at = timezone.now().isoformat()
+        ids = [f"file_{uuid.uuid4().hex[:14]}" for _ in messages]
+        with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+            for message_id, (phone, text) in zip(ids, messages):
+                fh.write(json.dumps({"id": message_id, "phone": phone, "text": text, "sent_at": sent_at}) + "\n")
+        return ids
+
+    def send(self, phone, text):
+        return self.send_batch([(phone, text)])[0]
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """Return the process-wide provider configured in ``DUE_REMINDERS``."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                backend = import_string(reminder_setting("BACKEND"))
+                _provider = backend(**reminder_setting("OPTIONS"))
+    return _provider
+
+
+def reset_provider(**kwargs):
+    global _provider
+    if kwargs.get("setting") in (None, "DUE_REMINDERS"):
+        _provider = None
+
+
+setting_changed.connect(reset_provider)
+
+
+class TokenBucket:
+    """Allow ``rate`` sends per second on average, in bursts of up to
+    ``capacity``. ``acquire`` sleeps until enough tokens have built up."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError(f"The send rate must be positive, not {rate}.")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1):
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot take {tokens} tokens from a bucket of {self.capacity}.")
+        self._refill()
+        if self.tokens < tokens:
+            self.sleep((tokens - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= tokens
+
+
+def _months_text(periods):
+    if len(periods) == 1:
+        return f"{periods[0]:%B %Y}"
+    return f"{len(periods)} months, {periods[0]:%b %Y} to {periods[-1]:%b %Y}"
+
+
+def queue_reminders(period=None, students=None, chunk_size=500):
+    """Add an outbox row for each student with unpaid fees up to ``period``.
+
+    Students with a parent phone number are read in id order, ``chunk_size``
+    at a time, and their unpaid records fetched with one query per chunk.
+    Students already reminded for the period are skipped, and the unique
+    constraint on (student, period) keeps concurrent runs from queueing
+    twice. Returns ``{"students", "queued"}``, where ``queued`` counts the
+    rows actually added.
+    """
+    period = period or current_period()
+    students = StudentProfile.objects.all() if students is None else students
+    students = (
+        students.exclude(parent_phone_number__isnull=True)
+        .exclude(parent_phone_number="")
+        .exclude(reminders__period=period)
+        .order_by("id")
+    )
+    template = reminder_setting("MESSAGE")
+
+    summary = {"students": 0, "queued": 0}
+    last_id = 0
+    while True:
+        chunk = list(students.filter(id__gt=last_id).values_list("id", "full_name", "parent_phone_number")[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+        summary["students"] += len(chunk)
+
+        due = defaultdict(list)
+        records = (
+            FeeRecord.objects.filter(student_profile_id__in=[row[0] for row in chunk], status="unpaid", period__lte=period)
+            .order_by("student_profile_id", "period")
+            .values_list("student_profile_id", "period", "amount")
+        )
+        for student_id, record_period, amount in records:
+            due[student_id].append((record_period, amount))
+
+        reminders = [
+            DueReminder(
+                student_profile_id=student_id,
+                period=period,
+                phone=phone.strip(),
+                message=template.format(
+                    name=name,
+                    amount=sum(amount for _, amount in due[student_id]),
+                    months=_months_text([p for p, _ in due[student_id]]),
+                    period=period,
+                ),
+            )
+            for student_id, name, phone in chunk
+            if due[student_id]
+        ]
+        # ignore_conflicts hides which rows a concurrent run got to first, so
+        # count the outbox rather than the rows offered.
+        outbox = DueReminder.objects.filter(period=period, student_profile_id__in=[r.student_profile_id for r in reminders])
+        with transaction.atomic():
+            before = outbox.count()
+            DueReminder.objects.bulk_create(reminders, ignore_conflicts=True)
+            summary["queued"] += outbox.count() - before
+    return summary
+
+
+def _still_due(reminders):
+    """Ids of ``reminders`` whose student still has an unpaid month up to the
+    reminder's period."""
+    earliest = dict(
+        FeeRecord.objects.filter(
+            student_profile_id__in={r.student_profile_id for r in reminders},
+            status="unpaid",
+            period__lte=max(r.period for r in reminders),
+        )
+        .order_by().values("student_profile").annotate(first=Min("period")).values_list("student_profile", "first")
+    )
+    return {r.id for r in reminders if r.student_profile_id in earliest and earliest[r.student_profile_id] <= r.period}
+
+
+def send_due_reminders(batch_size=100, provider=None, bucket=None):
+    """Claim and send one batch of queued reminders.
+
+    Rows are claimed with an UPDATE, as payment proofs are, so several
+    workers can share the outbox. Reminders whose fees were paid since they
+    were queued are cancelled. The rest go to the provider in batches no
+    larger than the bucket allows. Failed sends are retried with exponential
+    backoff up to ``MAX_ATTEMPTS``; ``InvalidRecipient`` fails at once.
+
+    At most as many rows are claimed as the bucket lets through in half of
+    ``STALE_AFTER``, so another worker never reclaims rows this one is still
+    working through.
+
+    Returns ``{"claimed", "sent", "retrying", "failed", "cancelled"}``.
+    """
+    provider = provider or get_provider()
+    bucket = bucket or TokenBucket(reminder_setting("RATE"), reminder_setting("BURST"))
+    summary = {"claimed": 0, "sent": 0, "retrying": 0, "failed": 0, "cancelled": 0}
+
+    stale_after = reminder_setting("STALE_AFTER")
+    batch_size = max(1, min(batch_size, int(bucket.capacity + bucket.rate * stale_after / 2)))
+    now = timezone.now()
+    stale = now - timedelta(seconds=stale_after)
+    claimable = Q(status="queued", next_attempt_at__lte=now) | Q(status="sending", claimed_at__lt=stale)
+    ids = list(DueReminder.objects.filter(claimable).order_by("id").values_list("id", flat=True)[:batch_size])
+    if not ids:
+        return summary
+    DueReminder.objects.filter(claimable, id__in=ids).update(status="sending", claimed_at=now)
+    reminders = list(DueReminder.objects.filter(id__in=ids, status="sending", claimed_at=now).order_by("id"))
+    summary["claimed"] = len(reminders)
+    if not reminders:
+        return summary
+
+    still_due = _still_due(reminders)
+    cancelled = [r.id for r in reminders if r.id not in still_due]
+    if cancelled:
+        summary["cancelled"] = DueReminder.objects.filter(id__in=cancelled).update(status="cancelled", claimed_at=None)
+    reminders = [r for r in reminders if r.id in still_due]
+
+    max_attempts = reminder_setting("MAX_ATTEMPTS")
+    backoff = reminder_setting("RETRY_BACKOFF")
+    step = max(1, min(provider.max_batch_size, int(bucket.capacity)))
+    for start in range(0, len(reminders), step):
+        chunk = reminders[start:start + step]
+        bucket.acquire(len(chunk))
+        try:
+            results = provider.send_batch([(r.phone, r.message) for r in chunk])
+        except ReminderError as exc:
+            results = [exc] * len(chunk)
+
+        finished = timezone.now()
+        for reminder, result in zip(chunk, results):
+            reminder.attempts += 1
+            reminder.claimed_at = None
+            if not isinstance(result, ReminderError):
+                reminder.status = "sent"
+                reminder.sent_at = finished
+                reminder.provider_message_id = result
+                reminder.error = ""
+                summary["sent"] += 1
+            elif isinstance(result, InvalidRecipient) or reminder.attempts >= max_attempts:
+                reminder.status = "failed"
+                reminder.error = str(result)
+                summary["failed"] += 1
+            else:
+                reminder.status = "queued"
+                reminder.error = str(result)
+                reminder.next_attempt_at = finished + timedelta(seconds=backoff * 2 ** (reminder.attempts - 1))
+                summary["retrying"] += 1
+        DueReminder.objects.bulk_update(
+            chunk, ["status", "attempts", "claimed_at", "sent_at", "provider_message_id", "error", "next_attempt_at"]
+        )
+    return summary
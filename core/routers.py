@@ -0,0 +1,92 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULTS = {
+    "ALIAS": "replica",
+    "VIEWS": [],
+    "MODELS": [],
+    "PIN_SECONDS": 10,
+    "PIN_COOKIE": "db_pin",
+}
+
+
+def replica_setting(name):
+    return getattr(settings, "DATABASE_REPLICA", {}).get(name, DEFAULTS[name])
+
+
+def replica_alias():
+    """The replica's alias, or None when no replica database is configured."""
+    alias = replica_setting("ALIAS")
+    return alias if alias in connections.settings else None
+
+
+class RoutingState:
+    def __init__(self, use_replica=False, pinned=False):
+        self.use_replica = use_replica
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = contextvars.ContextVar("db_routing", default=None)
+
+
+@contextmanager
+def routing(use_replica=False, pinned=False):
+    state = RoutingState(use_replica, pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def replica_reads():
+    """Read reporting models from the replica until the block writes."""
+    return routing(use_replica=True)
+
+
+def within(state, iterable):
+    """Iterate ``iterable`` under ``state``; for streamed responses, whose
+    queries run after the view has returned."""
+    token = _state.set(state)
+    try:
+        yield from iterable
+    finally:
+        _state.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads of ``DATABASE_REPLICA["MODELS"]`` to the replica, but only
+    inside ``replica_reads()`` or a view listed in ``DATABASE_REPLICA["VIEWS"]``.
+
+    Everything else, and every read after the first write in the same
+    request or block, uses the primary so users see their own changes.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state and state.use_replica and not state.pinned and model._meta.label in replica_setting("MODELS"):
+            return replica_alias() or DEFAULT_DB_ALIAS
+        # Explicit, so objects loaded from the replica don't pull their
+        # related objects from it later.
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, replica_setting("ALIAS")}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == replica_setting("ALIAS"):
+            return False
+        return None
@@ -0,0 +1,81 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .balances import refresh_balances
+from .fees import AcademicCalendar
+from .models import Bus, FeeRecord, StudentProfile, User
+from .tenants import new_row_school_id
+
+CLASSES = ["LKG", "UKG"] + [str(n) for n in range(1, 13)]
+
+
+def seed_dataset(buses=100, students=20000, seed=0, batch_size=2000, progress=None):
+    """Fill the database with a synthetic school for benchmarks.
+
+    Creates ``buses`` buses, ``students`` students spread evenly across them
+    and a full fee schedule per student, with a random mix of paid, pending
+    and unpaid months. Running it again adds another batch of buses and
+    students alongside the existing ones. Everything goes into the current
+    school (the default school outside a ``tenant_context`` block).
+    """
+    rng = random.Random(seed)
+    school_id = new_row_school_id()
+    fee_calendar = AcademicCalendar.from_settings()
+    now = timezone.now()
+
+    with transaction.atomic():
+        start = (Bus.all_objects.filter(school_id=school_id).order_by("-bus_number").values_list("bus_number", flat=True).first() or 0) + 1
+        bus_objs = Bus.objects.bulk_create([
+            Bus(
+                school_id=school_id,
+                bus_number=start + n,
+                bus_name=f"Route {start + n}",
+                driver_name=f"Driver {start + n}",
+                driver_phone=f"98{rng.randrange(10 ** 8):08d}",
+            )
+            for n in range(buses)
+        ])
+
+        for offset in range(0, students, batch_size):
+            count = min(batch_size, students - offset)
+            users = User.objects.bulk_create([
+                User(username=f"seed-{school_id}-{start}-{offset + n}", password=make_password(None), role="student", school_id=school_id)
+                for n in range(count)
+            ])
+            profiles = []
+            for n, user in enumerate(users):
+                bus = bus_objs[(offset + n) % len(bus_objs)]
+                profiles.append(StudentProfile(
+                    user=user,
+                    school_id=school_id,
+                    full_name=f"Student {offset + n:06d}",
+                    student_class=rng.choice(CLASSES),
+                    bus_route=bus.bus_name,
+                    monthly_fee=rng.choice([400, 500, 650, 800]),
+                    parent_phone_number=f"9{rng.randrange(10 ** 9):09d}",
+                    bus=bus,
+                    bus_number=bus.bus_number,
+                ))
+            profiles = StudentProfile.objects.bulk_create(profiles)
+
+            records = []
+            for profile in profiles:
+                paid_until = rng.randrange(len(fee_calendar.months) + 1)
+                for i, record in enumerate(profile.build_fee_records(fee_calendar)):
+                    if i < paid_until:
+                        record.status = record.verification_status = "paid"
+                        record.payment_date = now
+                        record.transaction_id = f"pay_seed{profile.pk}x{i}"
+                    elif i == paid_until and rng.random() < 0.1:
+                        record.status = record.verification_status = "pending"
+                    records.append(record)
+            FeeRecord.objects.bulk_create(records, batch_size=batch_size)
+            refresh_balances(profile.pk for profile in profiles)
+
+            if progress:
+                progress(offset + count, students)
+
+    return bus_objs
@@ -0,0 +1,44 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import balances
+from .backends import user_cache_key
+from .caching import invalidate_fee_summaries
+from .models import FeeRecord, PaymentOrder, School, StudentProfile, User
+from .tenants import forget_schools
+
+
+@receiver([post_save, post_delete], sender=FeeRecord)
+def fee_record_changed(sender, instance, **kwargs):
+    invalidate_fee_summaries([instance.student_profile_id])
+
+
+@receiver(post_save, sender=FeeRecord)
+def fee_record_saved(sender, instance, created, **kwargs):
+    balances.fee_record_saved(instance, created)
+
+
+@receiver(post_delete, sender=FeeRecord)
+def fee_record_deleted(sender, instance, **kwargs):
+    balances.fee_record_deleted(instance)
+
+
+@receiver([post_save, post_delete], sender=PaymentOrder)
+def payment_order_changed(sender, instance, **kwargs):
+    invalidate_fee_summaries([instance.student_id])
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+def student_profile_changed(sender, instance, **kwargs):
+    invalidate_fee_summaries([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=School)
+def school_changed(sender, instance, **kwargs):
+    forget_schools()
@@ -0,0 +1,25 @@
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Bus
+
+
+def bus_statistics():
+    """All buses annotated with their student and fee totals in one query.
+
+    Each bus gets ``student_count``, ``fees_collected``, ``fees_outstanding``
+    and ``pending_verifications``.
+    """
+    status = "students__fee_records__status"
+    amount = "students__fee_records__amount"
+    return Bus.objects.annotate(
+        student_count=Count("students", distinct=True),
+        fees_collected=Coalesce(Sum(amount, filter=Q(**{status: "paid"})), Value(0)),
+        fees_outstanding=Coalesce(Sum(amount, filter=Q(**{f"{status}__in": ["unpaid", "pending"]})), Value(0)),
+        pending_verifications=Count("students__fee_records", filter=Q(**{status: "pending"})),
+    ).order_by("bus_number")
+
+
+def totals(buses):
+    keys = ["student_count", "fees_collected", "fees_outstanding", "pending_verifications"]
+    return {key: sum(getattr(bus, key) for bus in buses) for key in keys}
@@ -0,0 +1,126 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULTS = {
+    "BASE_DOMAIN": "",
+    "DEFAULT_SCHOOL": "default",
+    "CACHE_TIMEOUT": 300,
+}
+
+VERSION_KEY = "school-hosts:version"
+
+_current = contextvars.ContextVar("current_school", default=None)
+
+
+def tenant_setting(name):
+    return getattr(settings, "TENANTS", {}).get(name, DEFAULTS[name])
+
+
+def current_school():
+    """The school of the current request or ``tenant_context`` block, or None
+    (management commands and workers, which see every school)."""
+    return _current.get()
+
+
+@contextmanager
+def tenant_context(school):
+    token = _current.set(school)
+    try:
+        yield school
+    finally:
+        _current.reset(token)
+
+
+def within(school, iterable):
+    """Iterate ``iterable`` scoped to ``school``; for streamed responses,
+    whose queries run after the middleware has returned."""
+    token = _current.set(school)
+    try:
+        yield from iterable
+    finally:
+        _current.reset(token)
+
+
+def _cache_key(name):
+    version = cache.get_or_set(VERSION_KEY, 1, None)
+    return f"school:{version}:{name}"
+
+
+def forget_schools():
+    """Drop every cached host lookup, after a school is added or changed."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        pass
+
+
+def _cached(name, lookup):
+    key = _cache_key(name)
+    school = cache.get(key)
+    if school is None:
+        # Misses are cached as False, so unknown hosts don't query each time.
+        school = lookup() or False
+        cache.set(key, school, tenant_setting("CACHE_TIMEOUT"))
+    return school or None
+
+
+def default_school():
+    """The school for single-school installs and rows created outside a
+    request, named by ``TENANTS["DEFAULT_SCHOOL"]``; None if that is empty."""
+    from .models import School
+
+    slug = tenant_setting("DEFAULT_SCHOOL")
+    if not slug:
+        return None
+    return _cached(f"slug:{slug}", lambda: School.objects.get_or_create(
+        slug=slug, defaults={"name": slug.replace("-", " ").title()}
+    )[0])
+
+
+def new_row_school_id():
+    """The school for rows saved without one: the current school, else the
+    default school."""
+    school = current_school() or default_school()
+    return school.pk if school else None
+
+
+def school_for_command(slug, bus=None):
+    """The school named by a management command's ``--school`` option, or
+    None (every school) when it wasn't given. Bus numbers repeat across
+    schools, so a ``--bus`` without ``--school`` means the default school."""
+    from django.core.management.base import CommandError
+
+    from .models import School
+
+    if not slug:
+        if bus is None:
+            return None
+        school = default_school()
+        if school is None:
+            raise CommandError("Bus numbers are per school; give --school with --bus.")
+        return school
+    try:
+        return School.objects.get(slug=slug)
+    except School.DoesNotExist:
+        raise CommandError(f"No school with slug {slug!r}.")
+
+
+def school_for_host(host):
+    """The school served at ``host``: one whose ``domain`` matches exactly,
+    else ``<slug>.<BASE_DOMAIN>``, else the default school. Cached per host,
+    so resolving a request normally costs no query."""
+    from .models import School
+
+    host = host.split(":")[0].lower()
+
+    def lookup():
+        school = School.objects.filter(domain=host).first()
+        base = tenant_setting("BASE_DOMAIN")
+        if school is None and base and host.endswith(f".{base}"):
+            school = School.objects.filter(slug=host[:-len(base) - 1]).first()
+        return school
+
+    return _cached(f"host:{host}", lookup) or default_school()
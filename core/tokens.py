@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+SALT = "core.activation"
+
+
+def _fingerprint(user):
+    # Tied to the stored password, so a token stops working once it is used.
+    return salted_hmac(SALT, user.password).hexdigest()[:16]
+
+
+def make_activation_token(user):
+    return signing.dumps({"id": user.pk, "fp": _fingerprint(user)}, salt=SALT)
+
+
+def check_activation_token(token):
+    """Return the user for a valid, unexpired and unused token, else None."""
+    try:
+        data = signing.loads(token, salt=SALT, max_age=settings.ACTIVATION_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+    User = get_user_model()
+    user = User.objects.filter(pk=data.get("id"), is_active=True).first()
+    if user is None or not constant_time_compare(data.get("fp", ""), _fingerprint(user)):
+        return None
+    return user
@@ -1,14 +1,23 @@
 from django.urls import path
+from .api import api_buses, api_fee_status, api_fees, api_students
 from .views import (
     landing_view,
     login_view,
     logout_view,
     student_dashboard,
+    upload_payment_proof,
     admin_dashboard,
     admin_bus_list,
     admin_add_bus,
     admin_bus_students,
+    admin_ledger,
+    admin_export_fees,
+    admin_bulk_fee_update,
+    admin_defaulters,
     admin_add_student,
+    admin_import_students,
+    admin_student_activation,
+    activate_account,
     admin_edit_student,
     admin_delete_student,
     admin_view_student_fees,
@@ -23,7 +32,10 @@ urlpatterns = [
     path("login/", login_view, name="login"),
     path("logout/", logout_view, name="logout"),
 
+    path("activate/<str:token>/", activate_account, name="activate_account"),
+
     path("student/dashboard/", student_dashboard, name="student_dashboard"),
+    path("student/fees/<int:record_id>/proof/", upload_payment_proof, name="upload_payment_proof"),
 
     path("admin/dashboard/", admin_dashboard, name="admin_dashboard"),
 
@@ -32,12 +44,24 @@ urlpatterns = [
     path("admin/buses/<int:bus_id>/", admin_bus_students, name="admin_bus_students"),
     path("admin/buses/<int:bus_id>/add-student/", admin_add_student, name="admin_add_student"),
 
+    path("admin/ledger/", admin_ledger, name="admin_ledger"),
+    path("admin/ledger/export/", admin_export_fees, name="admin_export_fees"),
+    path("admin/ledger/bulk-update/", admin_bulk_fee_update, name="admin_bulk_fee_update"),
+    path("admin/defaulters/", admin_defaulters, name="admin_defaulters"),
+    path("admin/students/import/", admin_import_students, name="admin_import_students"),
+
+    path("admin/student/<int:student_id>/activation/", admin_student_activation, name="admin_student_activation"),
     path("admin/student/<int:student_id>/edit/", admin_edit_student, name="admin_edit_student"),
     path("admin/student/<int:student_id>/delete/", admin_delete_student, name="admin_delete_student"),
 
     path("admin/student/<int:student_id>/fees/", admin_view_student_fees, name="admin_view_student_fees"),
     path("admin/student/<int:student_id>/fees/<int:record_id>/update/", admin_fee_update, name="admin_fee_update"),
 
+    path("api/buses/", api_buses, name="api_buses"),
+    path("api/students/", api_students, name="api_students"),
+    path("api/fees/", api_fees, name="api_fees"),
+    path("api/fees/status/", api_fee_status, name="api_fee_status"),
+
     path("payment/create-order/", create_razorpay_order, name="create_razorpay_order"),
     path("payment/verify/", verify_payment, name="verify_payment"),
     path("payment/webhook/", razorpay_webhook, name="razorpay_webhook"),
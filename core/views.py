@@ -1,19 +1,48 @@
 import json
 import hmac
 import hashlib
-import razorpay
 
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth.forms import SetPasswordForm
 from django.contrib.auth.decorators import login_required
+from django.urls import reverse
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponseForbidden, HttpResponse
-from django.views.decorators.csrf import csrf_exempt
+from django.http import JsonResponse, HttpResponseForbidden, HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.conf import settings
 
-from .models import StudentProfile, FeeRecord, PaymentOrder, Bus
-from .forms import AdminCreateStudentForm, AdminEditStudentForm, BusForm
+from .models import StudentProfile, FeeRecord, PaymentOrder, Bus, WebhookEvent
+from .forms import AdminCreateStudentForm, AdminEditStudentForm, BusForm, StudentImportUploadForm, LedgerFilterForm, DefaultersFilterForm, PaymentProofForm, BulkFeeUpdateForm
+from .bulk_import import ImportFileError, import_students, read_rows, validate_rows
 from .decorators import role_required
+from .gateway import GatewayError, get_gateway
+from .webhooks import event_id_for
+from .caching import get_fee_summary
+from .conditional import bus_students_state, conditional_page, student_dashboard_state, student_fees_state
+from .fees import parse_period
+from .tokens import check_activation_token, make_activation_token
+from .stats import bus_statistics, totals
+from .balances import refresh_stale_balances
+from .ledger import bulk_set_status, filter_fee_records, filter_students, has_filters
+from .exports import csv_chunks, fee_ledger_rows, gzip_chunks
+from .pagination import InvalidCursor, keyset_page
+from .proofs import HashingUploadHandler, enqueue, store_upload
+
+PAGE_SIZE = 50
+
+
+def _page(request, queryset, ordering):
+    try:
+        return keyset_page(queryset, ordering, request.GET.get("cursor"), PAGE_SIZE)
+    except InvalidCursor:
+        return keyset_page(queryset, ordering, None, PAGE_SIZE)
+
+
+def _querystring_without_cursor(request):
+    params = request.GET.copy()
+    params.pop("cursor", None)
+    return params.urlencode()
 
 
 def landing_view(request):
@@ -49,12 +78,12 @@ def logout_view(request):
 
 @login_required
 @role_required("student")
+@conditional_page(student_dashboard_state)
 def student_dashboard(request):
-    profile = request.user.student_profile
-    records = profile.fee_records.all().order_by("id")
+    summary = getattr(request, "fee_summary", None) or get_fee_summary(request.student_profile_id)
     return render(request, "core/student_dashboard.html", {
-        "profile": profile,
-        "fee_records": records,
+        "profile": summary["profile"],
+        "fee_records": summary["fee_records"],
         "razorpay_key_id": settings.RAZORPAY_KEY_ID,
     })
 
@@ -62,14 +91,14 @@ def student_dashboard(request):
 @login_required
 @role_required("admin")
 def admin_dashboard(request):
-    buses = Bus.objects.all().order_by("bus_number")
-    return render(request, "core/admin_dashboard.html", {"buses": buses})
+    buses = list(bus_statistics())
+    return render(request, "core/admin_dashboard.html", {"buses": buses, "totals": totals(buses)})
 
 
 @login_required
 @role_required("admin")
 def admin_bus_list(request):
-    buses = Bus.objects.all().order_by("bus_number")
+    buses = bus_statistics()
     return render(request, "core/admin_bus_list.html", {"buses": buses})
 
 
@@ -88,15 +117,116 @@ def admin_add_bus(request):
 
 @login_required
 @role_required("admin")
+@conditional_page(bus_students_state)
 def admin_bus_students(request, bus_id):
     bus = get_object_or_404(Bus, id=bus_id)
-    students = StudentProfile.objects.filter(bus=bus).order_by("full_name")
+    students = _page(request, StudentProfile.objects.filter(bus=bus), ["full_name", "id"])
     return render(request, "core/admin_bus_students.html", {
         "bus": bus,
         "students": students
     })
 
 
+@login_required
+@role_required("admin")
+def admin_ledger(request):
+    form = LedgerFilterForm(request.GET)
+    valid = form.is_valid()
+    filters = form.cleaned_data
+
+    if filters.get("view") == "students":
+        rows, ordering = filter_students(filters), ["full_name", "id"]
+    else:
+        rows, ordering = filter_fee_records(filters), ["id"]
+    # Show nothing rather than the unfiltered ledger until the filters are fixed.
+    page = _page(request, rows if valid else rows.none(), ordering)
+
+    return render(request, "core/admin_ledger.html", {
+        "form": form,
+        "view": filters.get("view") or "fees",
+        "page": page,
+        "querystring": _querystring_without_cursor(request),
+        "bulk_form": BulkFeeUpdateForm(),
+    })
+
+
+@login_required
+@role_required("admin")
+def admin_defaulters(request):
+    form = DefaultersFilterForm(request.GET)
+    valid = form.is_valid()
+    filters = form.cleaned_data
+    refresh_stale_balances()
+    students = filter_students(filters).filter(outstanding_amount__gt=0)
+    if filters.get("min_months"):
+        students = students.filter(unpaid_months__gte=filters["min_months"])
+    if not valid:
+        students = students.none()
+    return render(request, "core/admin_defaulters.html", {
+        "form": form,
+        "page": _page(request, students, ["-outstanding_amount", "id"]),
+        "querystring": _querystring_without_cursor(request),
+    })
+
+
+@login_required
+@role_required("admin")
+def admin_bulk_fee_update(request):
+    # Filters come from the ledger's query string, the change from the POST body.
+    filter_form = LedgerFilterForm(request.GET)
+    filters_valid = filter_form.is_valid()
+    filters = filter_form.cleaned_data
+    querystring = _querystring_without_cursor(request)
+    if request.method != "POST":
+        return redirect(f"{reverse('admin_ledger')}?{querystring}")
+
+    form = BulkFeeUpdateForm(request.POST)
+    summary = None
+    if form.is_valid() and not filters_valid:
+        form.add_error(None, "The ledger filters are invalid; fix them and try again.")
+    elif form.is_valid():
+        if form.cleaned_data["ids"]:
+            filters = {**filters, "ids": form.cleaned_data["ids"]}
+        if not has_filters(filters):
+            form.add_error(None, "Filter the ledger first; updating every fee record at once is not allowed.")
+        else:
+            summary = bulk_set_status(
+                filter_fee_records(filters),
+                form.cleaned_data["new_status"],
+                form.cleaned_data["payment_date"],
+            )
+
+    return render(request, "core/admin_bulk_fee_update.html", {
+        "form": form,
+        "summary": summary,
+        "querystring": querystring,
+    })
+
+
+@login_required
+@role_required("admin")
+def admin_export_fees(request):
+    form = LedgerFilterForm(request.GET)
+    if not form.is_valid():
+        # A mistyped filter must not turn into an export of every record.
+        return JsonResponse({
+            "error": "Invalid filters.",
+            "fields": {name: list(errors) for name, errors in form.errors.items()},
+        }, status=400)
+
+    chunks = csv_chunks(fee_ledger_rows(filter_fee_records(form.cleaned_data)))
+    filename = "fee-ledger.csv"
+    content_type = "text/csv"
+    if request.GET.get("gzip") == "1":
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        content_type = "application/gzip"
+
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
 @login_required
 @role_required("admin")
 def admin_add_student(request, bus_id):
@@ -109,7 +239,7 @@ def admin_add_student(request, bus_id):
             student.bus = bus
             student.bus_number = bus.bus_number
             student.save()
-            return redirect("admin_bus_students", bus_id=bus.id)
+            return redirect("admin_student_activation", student_id=student.id)
     else:
         form = AdminCreateStudentForm()
 
@@ -119,6 +249,65 @@ def admin_add_student(request, bus_id):
     })
 
 
+@login_required
+@role_required("admin")
+def admin_import_students(request):
+    result = None
+    error = None
+
+    if request.method == "POST":
+        form = StudentImportUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                result = validate_rows(read_rows(upload.file, upload.name))
+            except (ImportFileError, UnicodeDecodeError) as exc:
+                error = str(exc)
+            else:
+                if result.ok and not form.cleaned_data["dry_run"]:
+                    import_students(result)
+    else:
+        form = StudentImportUploadForm()
+
+    return render(request, "core/admin_import_students.html", {
+        "form": form,
+        "result": result,
+        "error": error,
+    })
+
+
+@login_required
+@role_required("admin")
+def admin_student_activation(request, student_id):
+    student = get_object_or_404(StudentProfile.objects.select_related("user"), id=student_id)
+    link = None
+    if not student.user.has_usable_password():
+        link = request.build_absolute_uri(
+            reverse("activate_account", args=[make_activation_token(student.user)])
+        )
+    return render(request, "core/admin_student_activation.html", {
+        "student": student,
+        "link": link,
+    })
+
+
+def activate_account(request, token):
+    user = check_activation_token(token)
+    if user is None:
+        return render(request, "core/activate_account.html", {"invalid": True})
+
+    if request.method == "POST":
+        form = SetPasswordForm(user, request.POST)
+        if form.is_valid():
+            user = form.save()
+            login(request, user, backend="core.backends.CachedModelBackend")
+            return redirect("student_dashboard" if user.role == "student" else "admin_dashboard")
+    else:
+        form = SetPasswordForm(user)
+
+    return render(request, "core/activate_account.html", {"form": form, "username": user.username})
+
+
 @login_required
 @role_required("admin")
 def admin_edit_student(request, student_id):
@@ -156,9 +345,10 @@ def admin_delete_student(request, student_id):
 
 @login_required
 @role_required("admin")
+@conditional_page(student_fees_state)
 def admin_view_student_fees(request, student_id):
     student = get_object_or_404(StudentProfile, id=student_id)
-    fees = student.fee_records.all().order_by("id")
+    fees = student.fee_records.select_related("payment_proof").order_by("id")
     return render(request, "core/admin_student_fees.html", {
         "student": student,
         "fee_records": fees
@@ -168,7 +358,9 @@ def admin_view_student_fees(request, student_id):
 @login_required
 @role_required("admin")
 def admin_fee_update(request, student_id, record_id):
-    record = get_object_or_404(FeeRecord, id=record_id)
+    record = get_object_or_404(
+        FeeRecord.objects.select_related("student_profile", "payment_proof"), id=record_id, student_profile_id=student_id
+    )
 
     if request.method == "POST":
         status = request.POST.get("status")
@@ -185,33 +377,81 @@ def admin_fee_update(request, student_id, record_id):
         return redirect("admin_view_student_fees", student_id)
 
 
+    # The same screenshot submitted for another month or student is worth a second look.
+    reused_by = []
+    if record.payment_proof_id:
+        reused_by = (
+            FeeRecord.objects.filter(payment_proof_id=record.payment_proof_id)
+            .exclude(pk=record.pk)
+            .select_related("student_profile")
+        )
+
     return render(request, "core/admin_fee_update.html", {
-        "record": record
+        "record": record,
+        "student": record.student_profile,
+        "reused_by": reused_by,
     })
 
 
+@csrf_exempt
 @login_required
 @role_required("student")
-def create_razorpay_order(request):
+def upload_payment_proof(request, record_id):
+    # The upload handler has to be swapped before anything reads request.POST,
+    # including the CSRF check, which runs in _upload_payment_proof instead.
+    handler = HashingUploadHandler(request)
+    request.upload_handlers = [handler]
+    return _upload_payment_proof(request, record_id, handler)
+
+
+@csrf_protect
+def _upload_payment_proof(request, record_id, handler):
+    record = get_object_or_404(FeeRecord, id=record_id, student_profile_id=request.student_profile_id)
+    if record.status == "paid":
+        return redirect("student_dashboard")
+
+    if request.method == "POST":
+        form = PaymentProofForm(request.POST, request.FILES)
+        if handler.too_large:
+            form.add_error("screenshot", "This file is too large.")
+        if form.is_valid():
+            proof, created = store_upload(form.cleaned_data["screenshot"])
+            record.payment_proof = proof
+            record.transaction_id = form.cleaned_data["transaction_id"] or record.transaction_id
+            record.status = "pending"
+            record.verification_status = "pending"
+            record.save(update_fields=["payment_proof", "transaction_id", "status", "verification_status", "updated_at"])
+            if created:
+                enqueue(proof)
+            return redirect("student_dashboard")
+    else:
+        form = PaymentProofForm()
+
+    return render(request, "core/upload_payment_proof.html", {"form": form, "record": record})
+
+
+@login_required
+@role_required("student")
+async def create_razorpay_order(request):
     data = json.loads(request.body.decode("utf-8"))
     amount = data.get("amount")
-    month = data.get("month")
+    try:
+        period = parse_period(data.get("period"))
+    except ValueError:
+        return JsonResponse({"error": "Unknown billing period."}, status=400)
 
-    profile = request.user.student_profile
-    record = FeeRecord.objects.filter(student_profile=profile, month=month).first()
+    profile = await StudentProfile.objects.aget(user=await request.auser())
+    record = await FeeRecord.objects.filter(student_profile=profile, period=period).afirst()
 
-    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+    try:
+        order = await get_gateway().acreate_order(int(amount) * 100)
+    except GatewayError:
+        return JsonResponse({"error": "Payment gateway unavailable, please try again."}, status=503)
 
-    order = client.order.create({
-        "amount": int(amount) * 100,
-        "currency": "INR",
-        "payment_capture": 1
-    })
-
-    PaymentOrder.objects.create(
+    await PaymentOrder.objects.acreate(
         student=profile,
         fee_record=record,
-        month=month,
+        period=period,
         amount=amount,
         order_id=order["id"],
         status="created"
@@ -223,33 +463,51 @@ def create_razorpay_order(request):
     })
 
 
+def _checkout_signature_valid(order_id, payment_id, signature):
+    """Razorpay signs ``order_id|payment_id`` with the key secret; anything
+    else could come from a student who never paid."""
+    secret = settings.RAZORPAY_KEY_SECRET
+    if not (secret and order_id and payment_id and isinstance(signature, str)):
+        return False
+    expected = hmac.new(secret.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
 @login_required
 @role_required("student")
-def verify_payment(request):
+async def verify_payment(request):
     data = json.loads(request.body.decode("utf-8"))
     order_id = data.get("razorpay_order_id")
     payment_id = data.get("razorpay_payment_id")
     signature = data.get("razorpay_signature")
 
-    order = PaymentOrder.objects.get(order_id=order_id)
+    if not _checkout_signature_valid(order_id, payment_id, signature):
+        return JsonResponse({"error": "Payment signature does not match."}, status=400)
+
+    order = await aget_object_or_404(
+        PaymentOrder.objects.select_related("fee_record"),
+        order_id=order_id,
+        student__user=await request.auser(),
+    )
 
     order.payment_id = payment_id
     order.signature = signature
     order.status = "paid"
-    order.save()
+    await order.asave()
 
     record = order.fee_record
-    record.status = "paid"
-    record.payment_date = timezone.now()
-    record.transaction_id = payment_id
-    record.verification_status = "paid"
-    record.save()
+    if record is not None:
+        record.status = "paid"
+        record.payment_date = timezone.now()
+        record.transaction_id = payment_id
+        record.verification_status = "paid"
+        await record.asave()
 
     return JsonResponse({"status": "success"})
 
 
 @csrf_exempt
-def razorpay_webhook(request):
+async def razorpay_webhook(request):
     body = request.body
     received = request.META.get("HTTP_X_RAZORPAY_SIGNATURE", "")
     secret = settings.RAZORPAY_WEBHOOK_SECRET
@@ -258,4 +516,8 @@ def razorpay_webhook(request):
     if not hmac.compare_digest(received, expected):
         return HttpResponseForbidden()
 
-    return HttpResponse(status=200)
\ No newline at end of file
+    await WebhookEvent.objects.abulk_create(
+        [WebhookEvent(event_id=event_id_for(request.META, body), payload=body.decode("utf-8"))],
+        ignore_conflicts=True,
+    )
+    return HttpResponse(status=200)
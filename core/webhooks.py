@@ -0,0 +1,52 @@
+import hashlib
+import json
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import WebhookEvent
+from .payments import apply_captured_payments
+
+CAPTURE_EVENTS = {"payment.captured", "order.paid"}
+
+
+def event_id_for(request_meta, body):
+    return request_meta.get("HTTP_X_RAZORPAY_EVENT_ID") or hashlib.sha256(body).hexdigest()
+
+
+def _captured_payment(data):
+    entity = data["payload"]["payment"]["entity"]
+    return entity["order_id"], entity["id"]
+
+
+def process_pending_events(batch_size=100):
+    """Apply one batch of unprocessed webhook events; returns its size.
+
+    Malformed events are marked processed with an error so they don't block
+    the queue. Any other failure rolls the whole batch back for a retry.
+    """
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True)
+            .order_by("id")[:batch_size]
+        )
+        payments = {}
+        for event in events:
+            try:
+                data = json.loads(event.payload)
+                event.event_type = data["event"]
+                if event.event_type in CAPTURE_EVENTS:
+                    order_id, payment_id = _captured_payment(data)
+                    payments[order_id] = payment_id
+            except (ValueError, KeyError, TypeError) as exc:
+                event.error = f"{exc.__class__.__name__}: {exc}"
+
+        apply_captured_payments(payments)
+
+        now = timezone.now()
+        for event in events:
+            event.processed_at = now
+        WebhookEvent.objects.bulk_update(events, ["event_type", "processed_at", "error"])
+
+    return len(events)